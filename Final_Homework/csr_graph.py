@@ -0,0 +1,178 @@
+from array import array
+
+
+class CSRGraph:
+    """Read-only graph stored in compressed sparse row form: the outgoing edges of every vertex are contiguous in flat
+    arrays, sorted by destination. It offers the read methods of Graph."""
+
+    # ------------------------- nested Vertex class -------------------------
+    class Vertex:
+        """Lightweight vertex structure for a graph."""
+        __slots__ = '_element', '_index'
+
+        def __init__(self, x, i):
+            """Do not call constructor directly. The vertices are created by CSRGraph."""
+            self._element = x
+            self._index = i
+
+        def element(self):
+            """Return element associated with this vertex."""
+            return self._element
+
+        def __hash__(self):         # will allow vertex to be a map/set key
+            return hash(id(self))
+
+        def __str__(self):
+            return str(self._element)
+
+    # ------------------------- nested Edge class -------------------------
+    class Edge:
+        """Read-only view of an edge of the graph, whose element is read from the weights array."""
+        __slots__ = '_graph', '_index'
+
+        def __init__(self, graph, i):
+            """Do not call constructor directly. The edges are returned by CSRGraph."""
+            self._graph = graph
+            self._index = i
+
+        @property
+        def _origin(self):
+            return self._graph._vertices[self._graph._tail[self._index]]
+
+        @property
+        def _destination(self):
+            return self._graph._vertices[self._graph._head[self._index]]
+
+        @property
+        def _element(self):
+            return self._graph._weight[self._index]
+
+        def endpoints(self):
+            """Return (u,v) tuple for vertices u and v."""
+            return (self._origin, self._destination)
+
+        def opposite(self, v):
+            """Return the vertex that is opposite v on this edge."""
+            if not isinstance(v, CSRGraph.Vertex):
+                raise TypeError('v must be a Vertex')
+            if v is self._origin:
+                return self._destination
+            elif v is self._destination:
+                return self._origin
+            raise ValueError('v not incident to edge')
+
+        def element(self):
+            """Return element associated with this edge."""
+            return self._element
+
+        def __eq__(self, other):
+            return type(other) is type(self) and other._graph is self._graph and other._index == self._index
+
+        def __hash__(self):         # will allow edge to be a map/set key
+            return hash((id(self._graph), self._index))
+
+        def __str__(self):
+            return '({0},{1},{2})'.format(self._origin, self._destination, self._element)
+
+    # ------------------------- CSRGraph methods -------------------------
+    def __init__(self, V, E, directed=False):
+        """Create the graph with a vertex for every element of V and an edge for every key (u, v) of the dictionary E,
+        whose element is E[(u, v)].
+
+        Graph is directed if optional paramter is set to True.
+        """
+        self._directed = directed
+        self._vertices = [self.Vertex(x, i) for i, x in enumerate(V)]
+        index = {v._element: v._index for v in self._vertices}
+        integral = all(isinstance(x, int) for x in E.values())
+        self._tail = array('l', (index[u] for u, v in E))
+        self._head = array('l', (index[v] for u, v in E))
+        self._weight = array('q' if integral else 'd', E.values())
+        self._offsets, self._targets, self._edges = self._compress(self._tail, self._head, not directed)
+        self._incoming = None
+
+    def _compress(self, tail, head, both):
+        """Return offsets, destinations and edge indices of the edges leaving every vertex, sorted by destination.
+
+        If both is True every edge also leaves its destination.
+        """
+        n = len(self._vertices)
+        sources = tail + head if both else tail
+        targets = head + tail if both else head
+        order = sorted(range(len(sources)), key=lambda k: sources[k] * n + targets[k])
+        offsets = array('l', [0]) * (n + 1)
+        for k in sources:
+            offsets[k + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        m = len(tail)
+        return offsets, array('l', (targets[k] for k in order)), array('l', (k % m for k in order))
+
+    def _validate_vertex(self, v):
+        """Verify that v is a Vertex of this graph."""
+        if not isinstance(v, self.Vertex):
+            raise TypeError('Vertex expected')
+        if v._index >= len(self._vertices) or self._vertices[v._index] is not v:
+            raise ValueError('Vertex does not belong to this graph.')
+
+    def _adjacency(self, outgoing):
+        """Return the compressed rows of the outgoing (or incoming) edges."""
+        if outgoing or not self._directed:
+            return self._offsets, self._targets, self._edges
+        if self._incoming is None:
+            self._incoming = self._compress(self._head, self._tail, False)
+        return self._incoming
+
+    def is_directed(self):
+        """Return True if this is a directed graph; False if undirected."""
+        return self._directed
+
+    def vertex_count(self):
+        """Return the number of vertices in the graph."""
+        return len(self._vertices)
+
+    def vertices(self):
+        """Return an iteration of all vertices of the graph."""
+        return iter(self._vertices)
+
+    def edge_count(self):
+        """Return the number of edges in the graph."""
+        return len(self._weight)
+
+    def edges(self):
+        """Return a set of all edges of the graph."""
+        return {self.Edge(self, k) for k in range(len(self._weight))}
+
+    def get_edge(self, u, v):
+        """Return the edge from u to v, or None if not adjacent."""
+        self._validate_vertex(u)
+        self._validate_vertex(v)
+        low, high = self._offsets[u._index], self._offsets[u._index + 1]
+        while low < high:           # binary search of v among the sorted destinations of u
+            mid = (low + high) // 2
+            if self._targets[mid] < v._index:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self._offsets[u._index + 1] and self._targets[low] == v._index:
+            return self.Edge(self, self._edges[low])
+        return None
+
+    def degree(self, v, outgoing=True):
+        """Return number of (outgoing) edges incident to vertex v in the graph.
+
+        If graph is directed, optional parameter used to count incoming edges.
+        """
+        self._validate_vertex(v)
+        offsets = self._adjacency(outgoing)[0]
+        return offsets[v._index + 1] - offsets[v._index]
+
+    def incident_edges(self, v, outgoing=True):
+        """Return all (outgoing) edges incident to vertex v in the graph.
+
+        If graph is directed, optional parameter used to request incoming edges.
+        """
+        self._validate_vertex(v)
+        offsets, targets, edges = self._adjacency(outgoing)
+        for k in range(offsets[v._index], offsets[v._index + 1]):
+            yield self.Edge(self, edges[k])
@@ -1,31 +1,12 @@
-from graph import Graph
-
-
-def diffCut(Z, V_sub_Z, vert_mod, graph):
-    """ The purpose of this function is to calculate the difference between 
-        the cut (sum of weights) between Z and V_sub_Z (with vert_mod added or removed)
-                                        &
-        the cut between old Z and old V_sub_Z (without vert_mod added or removed)
-
-    Args:
-        Z (set): Python set of considered vertices
-        V_sub_Z (set): Python set of all vertices except those in Z
-        vert_mod (Vertex): Vertex modified in sets
-        graph (Graph): Graph containing all vertices and edges
+import time
 
-    Returns:
-        (int): Difference between cut values
-    """
-    diff_cuts = 0
-    for e in graph.incident_edges(vert_mod):
-        if (e._origin != vert_mod and e._origin._element in V_sub_Z) or (e._destination != vert_mod and e._destination._element in V_sub_Z):
-            diff_cuts += e.element()
-        elif (e._origin != vert_mod and e._origin._element in Z) or (e._destination != vert_mod and e._destination._element in Z):
-            diff_cuts -= e.element()
-    return diff_cuts
+from csr_graph import CSRGraph
+from graph import Graph
+from max_cut import cut_arrays, cut_gains, fm_refine, greedy_sides, multilevel_sides, multistart_sides
+from max_flow import ENGINES, ResidualNetwork
 
 
-def facebook_enmy(V, E):
+def facebook_enmy(V, E, csr=False, method="greedy", starts=32, workers=None, budget=None, stall=None, stats=None):
     """ The purpose of this function is to obtain by who the set of Democrats and the 
         set of Republicans are formed depending on voters and their enmities. 
         The level of enmity within each group has to be as low as possible, and the 
@@ -38,17 +19,64 @@ def facebook_enmy(V, E):
         E (dict): Python dictionary whose keys are Python tuples representing pairs 
             of voters that have a friendship relationship on Facebook, and whose values 
             represent the enmity level that Facebook assigned to the corresponding pair
+        csr (bool): True to store the graph as a CSRGraph built in bulk from E
+        method (str): "greedy" for a single greedy pass over V, "fm" to refine the greedy
+            partition with Fiduccia-Mattheyses passes until it is locally optimal,
+            "multilevel" to coarsen the graph, solve it and refine it back level by level,
+            "multistart" to keep the best of several randomized greedy and FM starts run in parallel
+        starts (int): Maximum number of starts of "multistart"
+        workers (int): Number of processes of "multistart" (all the cpus if None)
+        budget (float): Seconds after which "multistart" launches no more starts (no limit if None)
+        stall (int): Number of starts without a better cut after which "multistart" stops (no limit if None)
+        stats (dict): Python dictionary where the seconds spent building the graph and
+            solving, and the level of enmity between the two sets are written, if given
 
     Returns:
         (set): Python set of voters for Democrats
         (set): Python set of voters for Republicans
     """
+    if method not in ("greedy", "fm", "multilevel", "multistart"):
+        raise ValueError('method must be "greedy", "fm", "multilevel" or "multistart"')
+    if starts < 1:
+        raise ValueError('starts must be at least 1')
+    if workers is not None and workers < 1:
+        raise ValueError('workers must be at least 1')
+
+    # the gains of every vertex are computed on the flat arrays of the graph
+    started = time.perf_counter()
+    graph = CSRGraph(V, E) if csr else build_enmy_graph(V, E)
+    vertices, start, nbr, weight = cut_arrays(graph)
+    built = time.perf_counter()
+    if method == "multilevel":
+        side = multilevel_sides(start, nbr, weight)
+    elif method == "multistart":
+        side = multistart_sides(start, nbr, weight, starts, workers, budget, stall)
+    else:
+        side = greedy_sides(start, nbr, weight)
+    if method == "fm":
+        fm_refine(start, nbr, weight, side)
+    if stats is not None:
+        stats["build_seconds"] = built - started
+        stats["solve_seconds"] = time.perf_counter() - built
+        stats["cut"] = cut_gains(start, nbr, weight, side)[1]
+
+    K = {vertex.element() for vertex, x in zip(vertices, side) if x}
+    return K, V - K
+
+
+def build_enmy_graph(V, E):
+    """ Build the undirected Graph used by facebook_enmy, whose edges are the friendships
+        weighted by their enmity levels
+
+    Args:
+        V (set): Python set of voters (as in facebook_enmy)
+        E (dict): Python dictionary of friendships and their enmity levels (as in facebook_enmy)
+
+    Returns:
+        (Graph): Undirected graph of the voters
+    """
     graph = Graph()
     v_dict = dict()
-    K = set()
-    V_sub_K = V.copy()
-    C = V.copy()
-    V_sub_C = set()
 
     # fill v_dict with every vertex inserted in graph
     for vertex in V:
@@ -57,82 +85,51 @@ def facebook_enmy(V, E):
     # insert every edge in graph
     for edge in E.keys():
         graph.insert_edge(v_dict[edge[0]], v_dict[edge[1]], E.get(edge))
+    return graph
 
-    # execute the diffCut function on every vertex in V
-    for vertex in V:
-        # temporary add vertex in K and remove it from V_sub_K to calculate the gain
-        K.add(vertex)
-        V_sub_K.remove(vertex)
-
-        # temporary remove vertex from C and add it in V_sub_C to calculate the gain
-        C.remove(vertex)
-        V_sub_C.add(vertex)
-
-        # compare the gains to determine where the vertex should be
-        if diffCut(K, V_sub_K, v_dict[vertex], graph) >= diffCut(V_sub_C, C, v_dict[vertex], graph):
-            # revert changes in sets C and V_sub_C
-            C.add(vertex)
-            V_sub_C.remove(vertex)
-        else:
-            # revert changes in sets K and V_sub_K
-            K.remove(vertex)
-            V_sub_K.add(vertex)
-
-    return K, V - K
 
-
-def BFS_reduced(g, s, d, discovered):
-    """ Perform BFS of the undiscovered portion of Graph g starting at Vertex s
-        (should be mapped to None prior to the call) and ending at Vertex d.
-        Newly discovered vertices will be added to discovered as a result
+def build_friend_csr(V, E):
+    """ Build in bulk the directed CSRGraph used by facebook_friend: Dem is linked to
+        every voter and every voter to Rep using the likelihoods, and every friendship
+        becomes a forward and a backward edge
 
     Args:
-        g (Graph): Graph containing all vertices and edges
-        s (Vertex): Vertex from which to start
-        d (Vertex): Vertex that determines the end
-        discovered (dict): Python dictionary that maps each vertex to the edge
-            that was used to discover it during the BFS
+        V (dict): Python dictionary of voters and their likelihoods (as in facebook_friend)
+        E (dict): Python dictionary of friendships and their levels (as in facebook_friend)
+
+    Returns:
+        (CSRGraph): Directed graph of the voters
+        (Vertex): Vertex named Dem
+        (Vertex): Vertex named Rep
     """
-    level = [s]                                         # first level includes only s
-    while len(level) > 0:
-        next_level = []                                 # prepare to gather newly found vertices
-        for u in level:
-            ud_edge = g.get_edge(u, d)
-            if(ud_edge is not None):                    # exist an edge from u to d
-                if ud_edge._element != 0:
-                    discovered[d] = ud_edge             # ud_edge is the tree edge that discovered d
-                    return
-            for e in g.incident_edges(u):               # for every outgoing edge from u
-                if e._element != 0:
-                    v = e.opposite(u)
-                    if v not in discovered:             # v is an unvisited vertex
-                        discovered[v] = e               # e is the tree edge that discovered v
-                        next_level.append(v)            # v will be further considered in next pass
-        level = next_level                              # relabel 'next' level to become current
-
-
-def facebook_friend(V, E):
-    """ The purpose of this function is to obtain by who is formed the set of 
-        Democrats and the set of Republicans depending on voters and their friendships.
-        The level of friendship within each group has to be as large as possible, and the 
-        level of friendship among the two groups has to be as low as possible.
-        Besides, the level of friendship in a set of voters is computed as the sum of 
-        friendships among each pair of these voters that are friends on the social network.
-        Moreover, the function has to maximize the total likelihood of returned groups, 
-        where the total likelihood is the sum over all voters v of the likelihood that v
-        votes for the candidate of the group at which it is assigned
+    dem, rep = object(), object()                       # elements that can not be equal to any voter
+    edges = dict()
+    for vertex in V:
+        edges[(dem, vertex)] = V[vertex][0]
+        edges[(vertex, dem)] = 0
+        edges[(vertex, rep)] = V[vertex][1]
+        edges[(rep, vertex)] = 0
+    for edge in E:
+        edges[edge] = E[edge]
+        edges[(edge[1], edge[0])] = E[edge]
+    graph = CSRGraph([dem, rep, *V], edges, True)
+    vertices = list(graph.vertices())
+    return graph, vertices[0], vertices[1]
+
+
+def build_friend_graph(V, E):
+    """ Build the directed Graph used by facebook_friend: Dem is linked to every voter
+        and every voter to Rep using the likelihoods, and every friendship becomes
+        a forward and a backward edge
 
     Args:
-        V (dict): Python dictionary whose keys represent voters, and values are Python
-            tuples with the first entry being the likelihood for Democrats and the second
-            being the likelihood for Republicans
-        E (dict): Python dictionary whose keys represent pairs of voters that have a
-            friendness relationship on Facebook, and whose values represent the friendship 
-            level that Facebook assigned to the corresponding pair
+        V (dict): Python dictionary of voters and their likelihoods (as in facebook_friend)
+        E (dict): Python dictionary of friendships and their levels (as in facebook_friend)
 
     Returns:
-        (set): Python set of voters for Democrats
-        (set): Python set of voters for Republicans
+        (Graph): Directed graph of the voters
+        (Vertex): Vertex named Dem
+        (Vertex): Vertex named Rep
     """
     graph = Graph(True)                                 # there is the Arg True to create a directed graph
     v_dict = dict()
@@ -152,38 +149,118 @@ def facebook_friend(V, E):
     for edge in E:
         graph.insert_edge(v_dict.get(edge[0]), v_dict.get(edge[1]), E[edge])
         graph.insert_edge(v_dict.get(edge[1]), v_dict.get(edge[0]), E[edge])
+    return graph, Dem, Rep
 
-    # prepare the dictionary for the BFS_reduced function
-    discovered = dict()
-    discovered[Dem] = None
-    BFS_reduced(graph, Dem, Rep, discovered)            # find the first path from Dem to Rep
 
-    # update the graph structure until there are no more edges that link Dem to Rep
-    while discovered.get(Rep) is not None:
-        edge = discovered.get(Rep)
-        min = edge.element()                            # actually the minimum weight is that of the actual edge linked to Rep
+class FriendPartitioner:
+    """Partition of the voters computed as in facebook_friend, which keeps the residual network and its maximum flow
+    so that, when likelihoods or friendship levels change, the flow is repaired instead of recomputed from zero."""
 
-        edge = discovered.get(edge._origin)
-        while edge is not None:
-            if (edge.element() < min):                  # find the minimum weight of edge's path
-                min = edge.element()
-            edge = discovered.get(edge._origin)
+    def __init__(self, V, E, csr=False, method="dinic", stats=False):
+        """Create the partitioner of the voters V and the friendships E (as in facebook_friend)
 
-        edge = discovered.get(Rep)
-        while edge is not None:
-            edge._element -= min                                                # update the weight of forward edges
-            graph.get_edge(edge._destination, edge._origin)._element += min     # update the weight of backward edges
-            edge = discovered.get(edge._origin)
+        method is the max-flow algorithm used to augment the flow: "edmonds_karp", "dinic" or "push_relabel"
+        If stats is True the timers and the counters of the max-flow algorithm are kept in the dict self.stats
+        """
+        if method not in ENGINES:
+            raise ValueError('method must be "edmonds_karp", "dinic" or "push_relabel"')
+        started = time.perf_counter()
+        self._method = method
+        graph, Dem, Rep = build_friend_csr(V, E) if csr else build_friend_graph(V, E)
+        self._network = ResidualNetwork.from_graph(graph)
+        self._dem = self._network.index(Dem)
+        self._rep = self._network.index(Rep)
+        self._voters = dict()                           # voter -> integer of its vertex in the network
+        for i in range(self._network.vertex_count()):
+            if i != self._dem and i != self._rep:
+                self._voters[self._network.vertex(i).element()] = i
+        self._solved = False
+        self.stats = {"build_seconds": time.perf_counter() - started, "flow_seconds": 0.0} if stats else None
 
-        discovered = {}
-        discovered[Dem] = None
-        BFS_reduced(graph, Dem, Rep, discovered)        # find the next path from Dem to Rep
+    def _set_capacity(self, u, v, level):
+        """Set the capacity of the edge from the vertex u to the vertex v of the network"""
+        e = self._network.edge(u, v)
+        if e is None:
+            raise ValueError('there is no edge between the vertices')
+        self._network.set_capacity(e, level, self._dem, self._rep)
+        self._solved = False
 
-    D = set()
+    def update_likelihood(self, voter, likelihood):
+        """Change the likelihoods (for Democrats, for Republicans) of the voter"""
+        i = self._voters[voter]
+        self._set_capacity(self._dem, i, likelihood[0])
+        self._set_capacity(i, self._rep, likelihood[1])
 
-    for vertex in discovered.keys():
-        if vertex != Dem:
-            D.add(vertex.element())                     # add vertices to Democrats set
+    def update_friendship(self, u, v, level):
+        """Change the friendship level of the voters u and v, that must be friends"""
+        i, j = self._voters[u], self._voters[v]
+        e = self._network.edge(i, j)
+        if e is None or self._network.edge(j, i) != e ^ 1:
+            raise ValueError('u and v are not friends')
+        self._network.set_capacity(e, level, self._dem, self._rep)
+        self._network.set_capacity(e ^ 1, level, self._dem, self._rep)
+        self._solved = False
 
-    R = V.keys() - D
+    def flow_value(self):
+        """Return the value of the maximum flow, i.e. of the minimum cut"""
+        self.partition()
+        return self._network.flow_value(self._dem)
+
+    def partition(self):
+        """ Return the partition of the voters for the current likelihoods and friendships,
+            augmenting the flow kept from the previous call
+
+        Returns:
+            (set): Python set of voters for Democrats
+            (set): Python set of voters for Republicans
+        """
+        if not self._solved:
+            started = time.perf_counter()
+            ENGINES[self._method](self._network, self._dem, self._rep, stats=self.stats)
+            if self.stats is not None:
+                self.stats["flow_seconds"] += time.perf_counter() - started
+            self._solved = True
+        D = set()
+        for i in self._network.source_side(self._dem):
+            if i != self._dem:
+                D.add(self._network.vertex(i).element())        # add vertices to Democrats set
+        return D, self._voters.keys() - D
+
+
+def facebook_friend(V, E, csr=False, method="edmonds_karp", stats=None):
+    """ The purpose of this function is to obtain by who is formed the set of 
+        Democrats and the set of Republicans depending on voters and their friendships.
+        The level of friendship within each group has to be as large as possible, and the 
+        level of friendship among the two groups has to be as low as possible.
+        Besides, the level of friendship in a set of voters is computed as the sum of 
+        friendships among each pair of these voters that are friends on the social network.
+        Moreover, the function has to maximize the total likelihood of returned groups, 
+        where the total likelihood is the sum over all voters v of the likelihood that v
+        votes for the candidate of the group at which it is assigned
+
+    Args:
+        V (dict): Python dictionary whose keys represent voters, and values are Python
+            tuples with the first entry being the likelihood for Democrats and the second
+            being the likelihood for Republicans
+        E (dict): Python dictionary whose keys represent pairs of voters that have a
+            friendness relationship on Facebook, and whose values represent the friendship 
+            level that Facebook assigned to the corresponding pair
+        csr (bool): True to store the graph as a CSRGraph built in bulk from V and E
+        method (str): Max-flow algorithm run on the residual network of the graph:
+            "edmonds_karp", "dinic" or "push_relabel"
+        stats (dict): Python dictionary where the seconds spent building the network and
+            computing the flow, the counters of the max-flow algorithm (augmenting paths and
+            vertices expanded by every BFS, or pushes and relabels) and the value of the
+            minimum cut are written, if given
+
+    Returns:
+        (set): Python set of voters for Democrats
+        (set): Python set of voters for Republicans
+    """
+    # the residual capacities are kept in the network of the partitioner, so the weights of the graph are left intact
+    partitioner = FriendPartitioner(V, E, csr, method, stats is not None)
+    D, R = partitioner.partition()
+    if stats is not None:
+        stats.update(partitioner.stats)
+        stats["cut"] = partitioner.flow_value()
     return D, R
@@ -0,0 +1,339 @@
+import multiprocessing
+import os
+import random
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from heapq import heappop, heappush
+from itertools import accumulate, chain, islice, repeat
+from operator import eq, mul, ne, xor
+
+from csr_graph import CSRGraph
+
+
+_worker_graph = None
+
+
+def _init_worker(graph):
+    """Keep in the worker process the read-only arrays of the graph (inherited copy-on-write when the pool forks)"""
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _random_start(seed, patience, graph=None):
+    """ Compute a max-cut with a greedy pass in the random order given by seed, refined
+        with Fiduccia-Mattheyses passes
+
+    Returns:
+        (int): Cut value
+        (int): The seed
+        (bytearray): Side of every vertex
+    """
+    start, nbr, weight = graph or _worker_graph
+    order = list(range(len(start) - 1))
+    random.Random(seed).shuffle(order)
+    side = greedy_sides(start, nbr, weight, order)
+    fm_refine(start, nbr, weight, side, patience)
+    return cut_gains(start, nbr, weight, side)[1], seed, side
+
+
+def cut_arrays(graph):
+    """ Read the adjacency of an undirected weighted graph in compressed sparse row
+        form: the neighbors of the vertex i are nbr[start[i]:start[i + 1]]. The rows
+        of a CSRGraph are used as they are, unless it has self loops
+
+    Args:
+        graph (Graph): Undirected Graph or CSRGraph whose edge elements are the weights
+
+    Returns:
+        (list): Python list of the vertices, the vertex i being the i-th one
+        (array): Offsets of the neighbors of every vertex in nbr
+        (array): Neighbors grouped by vertex
+        (array): Weight of the edge to every neighbor
+    """
+    vertices = list(graph.vertices())
+    if isinstance(graph, CSRGraph) and all(map(ne, graph._tail, graph._head)):
+        weights = graph._weight
+        return vertices, graph._offsets, graph._targets, array(weights.typecode, map(weights.__getitem__, graph._edges))
+    index = {vertex: i for i, vertex in enumerate(vertices)}
+    start = array('l', [0])
+    nbr = array('l')
+    weight = []
+    for u in vertices:
+        for e in graph.incident_edges(u):
+            v = e.opposite(u)
+            if v is not u:                              # a self loop is never cut
+                nbr.append(index[v])
+                weight.append(e.element())
+        start.append(len(nbr))
+    integral = all(isinstance(x, int) for x in weight)
+    return vertices, start, nbr, array('q' if integral else 'd', weight)
+
+
+def cut_gains(start, nbr, weight, side):
+    """ Compute the gain of every vertex, i.e. how much the cut grows if the vertex
+        changes side, and the cut value with a few passes over the flat arrays, which
+        run in C through map and accumulate
+
+    Returns:
+        (list): Python list of the gains
+        (int): Total weight of the edges whose endpoints are on different sides
+    """
+    n = len(start) - 1
+    owner = chain.from_iterable(repeat(v, start[v + 1] - start[v]) for v in range(n))
+    same = map(eq, map(side.__getitem__, nbr), map(side.__getitem__, owner))
+    uncut = list(accumulate(map(mul, weight, same), initial=0))    # prefix sums of the weights of uncut edges
+    total = list(accumulate(weight, initial=0))                     # prefix sums of all the weights
+    gain = [2 * (uncut[j] - uncut[i]) - (total[j] - total[i]) for i, j in zip(start, islice(start, 1, None))]
+    cut = total[-1] - uncut[-1]
+    return gain, (cut / 2 if weight.typecode == 'd' else cut // 2)
+
+
+def greedy_sides(start, nbr, weight, order=None):
+    """ Assign the vertices to the sides 1 and 0 in order (or in the order of the
+        iterable order), putting every vertex on side 1 if its edges to the vertices
+        already on side 0 weigh at least as much as the ones to the vertices already
+        on side 1
+
+    Returns:
+        (bytearray): Side of every vertex
+    """
+    n = len(start) - 1
+    side = bytearray(b"\x02") * n                      # 2: not assigned yet
+    for v in range(n) if order is None else order:
+        lo, hi = start[v], start[v + 1]
+        sides = bytes(map(side.__getitem__, nbr[lo:hi]))
+        ws = weight[lo:hi]
+        to_zero = sum(map(mul, ws, map((0).__eq__, sides)))
+        to_one = sum(map(mul, ws, map((1).__eq__, sides)))
+        side[v] = to_zero >= to_one
+    return side
+
+
+def _flip(v, start, nbr, weight, side, gain):
+    """Move the vertex v to the other side and update the gains of v and of its neighbors"""
+    side[v] ^= 1
+    gain[v] = -gain[v]
+    for k in range(start[v], start[v + 1]):
+        u = nbr[k]
+        if side[u] == side[v]:                          # the edge is not cut any more
+            gain[u] += 2 * weight[k]
+        else:
+            gain[u] -= 2 * weight[k]
+
+
+def _fm_pass(start, nbr, weight, side, gain, tolerance=0, patience=None):
+    """ Perform a Fiduccia-Mattheyses pass: move every vertex once, always the unlocked
+        vertex with the largest gain (even if negative), then undo the moves after the
+        best prefix of the sequence; a prefix must beat the previous best by more than
+        tolerance, and the pass ends early after patience moves without a better prefix
+
+    Returns:
+        (int): Growth of the cut after the pass
+    """
+    n = len(start) - 1
+    locked = bytearray(n)
+    buckets = dict()                                    # gain -> set of the unlocked vertices with that gain
+    keys = []                                           # max-heap (negated) of the gains with a bucket
+    for v in range(n):
+        if gain[v] not in buckets:
+            buckets[gain[v]] = set()
+            heappush(keys, -gain[v])
+        buckets[gain[v]].add(v)
+    moves = []
+    total = best = 0
+    best_length = 0
+    while keys and (patience is None or len(moves) - best_length < patience):
+        g = -keys[0]
+        if g not in buckets:                            # stale key of an emptied bucket
+            heappop(keys)
+            continue
+        v = buckets[g].pop()
+        if not buckets[g]:
+            del buckets[g]
+        locked[v] = 1
+        for k in range(start[v], start[v + 1]):         # take the unlocked neighbors out of their buckets
+            u = nbr[k]
+            if not locked[u] and u in buckets.get(gain[u], ()):
+                buckets[gain[u]].discard(u)
+                if not buckets[gain[u]]:
+                    del buckets[gain[u]]
+        _flip(v, start, nbr, weight, side, gain)
+        for k in range(start[v], start[v + 1]):         # put them back with the new gains
+            u = nbr[k]
+            if not locked[u]:
+                if gain[u] not in buckets:
+                    buckets[gain[u]] = set()
+                    heappush(keys, -gain[u])
+                buckets[gain[u]].add(u)
+        total += g
+        moves.append(v)
+        if total > best + tolerance:
+            best = total
+            best_length = len(moves)
+    for v in reversed(moves[best_length:]):             # roll back the moves after the best prefix
+        _flip(v, start, nbr, weight, side, gain)
+    return best
+
+
+def fm_refine(start, nbr, weight, side, patience=None):
+    """ Refine the max-cut side (a bytearray of 0 and 1 per vertex) in place with
+        Fiduccia-Mattheyses passes until a pass does not grow the cut: then no single
+        vertex move can grow it, so the cut is locally optimal. With patience a pass
+        stops after that many moves without a better prefix
+
+    Returns:
+        (int): Growth of the cut
+    """
+    gain = cut_gains(start, nbr, weight, side)[0]
+    tolerance = 0 if weight.typecode == 'q' else 1e-12 * sum(abs(w) for w in weight)   # rounding of float gains
+    growth = 0
+    while True:
+        improvement = _fm_pass(start, nbr, weight, side, gain, tolerance, patience)
+        if improvement <= 0:
+            return growth
+        growth += improvement
+
+
+def _coarsen(start, nbr, weight):
+    """ Contract a heavy-edge matching of the graph: the endpoints of a matched edge of
+        positive weight become one coarse vertex with the two of them on opposite sides
+        (on the same side for a negative weight), and the weight of an edge between
+        vertices with opposite orientations changes sign
+
+    Returns:
+        (array): Coarse vertex of every vertex
+        (bytearray): 1 for the vertices whose side is the opposite of their coarse vertex
+        (tuple): Arrays start, nbr and weight of the coarse graph
+    """
+    n = len(start) - 1
+    cid = array('l', [-1]) * n
+    flip = bytearray(n)
+    members = []                                        # vertices of every coarse vertex
+    for v in range(n):
+        if cid[v] >= 0:
+            continue
+        mate, heavy = -1, 0
+        for k in range(start[v], start[v + 1]):         # the unmatched neighbor with the heaviest edge
+            u = nbr[k]
+            if cid[u] < 0 and u != v and abs(weight[k]) > heavy:
+                mate, heavy, w = u, abs(weight[k]), weight[k]
+        cid[v] = len(members)
+        if mate >= 0:
+            cid[mate] = len(members)
+            flip[mate] = w > 0
+            members.append((v, mate))
+        else:
+            members.append((v,))
+    m = len(members)
+    coarse_start = array('l', [0]) * (m + 1)
+    coarse_nbr = array('l')
+    coarse_weight = array(weight.typecode)
+    slot = array('l', [-1]) * m                         # position of every neighbor of the current vertex in coarse_nbr
+    for c, group in enumerate(members):
+        first = len(coarse_nbr)
+        for v in group:
+            for k in range(start[v], start[v + 1]):
+                u = nbr[k]
+                d = cid[u]
+                if d == c:                              # the matched edge is always cut (or never)
+                    continue
+                w = weight[k] if flip[v] == flip[u] else -weight[k]
+                if slot[d] < first:                     # first edge to d: older positions belong to other vertices
+                    slot[d] = len(coarse_nbr)
+                    coarse_nbr.append(d)
+                    coarse_weight.append(w)
+                else:                                   # parallel edges are merged
+                    coarse_weight[slot[d]] += w
+        coarse_start[c + 1] = len(coarse_nbr)
+    return cid, flip, (coarse_start, coarse_nbr, coarse_weight)
+
+
+def multilevel_sides(start, nbr, weight, coarsest=64, patience=200):
+    """ Compute a max-cut with the multilevel scheme: coarsen the graph by heavy-edge
+        matching until it has at most coarsest vertices (or stops shrinking), solve it
+        greedily, then project the sides back level by level refining them with
+        Fiduccia-Mattheyses passes that stop after patience moves without a better
+        prefix; a level is released as soon as it has been refined
+
+    Returns:
+        (bytearray): Side of every vertex
+    """
+    levels = []
+    graph = (start, nbr, weight)
+    while len(graph[0]) - 1 > coarsest:
+        cid, flip, coarse = _coarsen(*graph)
+        if len(coarse[0]) - 1 > 0.9 * (len(graph[0]) - 1):
+            break
+        levels.append((graph, cid, flip))
+        graph = coarse
+    side = greedy_sides(*graph)
+    fm_refine(*graph, side, patience)
+    while levels:
+        graph, cid, flip = levels.pop()
+        side = bytearray(map(xor, map(side.__getitem__, cid), flip))
+        fm_refine(*graph, side, patience)
+    return side
+
+
+def multistart_sides(start, nbr, weight, starts=32, workers=None, budget=None, stall=None, seed=0, patience=200):
+    """ Compute a max-cut as the best of several randomized starts (a greedy pass in
+        random order refined with Fiduccia-Mattheyses) run on a pool of workers processes
+        (all the cpus if workers is None) that share the arrays of the graph by fork
+
+    Args:
+        starts (int): Maximum number of starts, the start i using the seed seed + i
+        workers (int): Number of processes
+        budget (float): Seconds after which no more starts are launched, if given
+        stall (int): Stop after this many finished starts without a better cut, if given
+        seed (int): Seed of the first start
+        patience (int): Moves without a better prefix after which an FM pass ends
+
+    Returns:
+        (bytearray): Side of every vertex of the best cut (the one of the smallest seed on ties)
+    """
+    deadline = None if budget is None else time.monotonic() + budget
+    graph = (start, nbr, weight)
+    seeds = iter(range(seed, seed + starts))
+    best = None
+    since_best = 0
+
+    def keep(result):
+        """Keep result if it is the best cut so far and return True if the search can go on"""
+        nonlocal best, since_best
+        if best is None or (result[0], -result[1]) > (best[0], -best[1]):
+            best = result
+            since_best = 0
+        else:
+            since_best += 1
+        return ((deadline is None or time.monotonic() < deadline) and
+                (stall is None or since_best < stall))
+
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for s in seeds:
+            if not keep(_random_start(s, patience, graph)):
+                break
+        return best[2]
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                             initargs=(graph,)) as executor:
+        pending = set()
+        going = True
+        while True:
+            while going and len(pending) < workers:
+                s = next(seeds, None)
+                if s is None:
+                    break
+                pending.add(executor.submit(_random_start, s, patience))
+            if len(pending) == 0:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                going = keep(future.result()) and going
+            if not going:                               # the starts not running yet are dropped
+                for future in pending:
+                    future.cancel()
+                pending = {future for future in pending if not future.cancelled()}
+    return best[2]
@@ -0,0 +1,392 @@
+from array import array
+from collections import deque
+
+
+class ResidualNetwork:
+    """Residual network stored in flat arrays: the arc k is the edge 2k and its reverse is the edge 2k + 1, so that the
+    reverse of the edge e is always e ^ 1. Every edge has a capacity and a flow (the flow of e ^ 1 is minus the flow of
+    e) and its residual capacity is their difference."""
+
+    def __init__(self, n, arcs):
+        """Create the network with the vertices 0, ..., n - 1 and no flow.
+
+        arcs is a list of (u, v, capacity, reverse capacity) tuples.
+        """
+        integral = all(isinstance(c, int) and isinstance(rc, int) for u, v, c, rc in arcs)
+        m = 2 * len(arcs)
+        self._head = array('l', [0]) * m
+        self._capacity = array('q' if integral else 'd', [0]) * m
+        self._flow = array('q' if integral else 'd', [0]) * m
+        self._start = array('l', [0]) * (n + 1)
+        for k, (u, v, c, rc) in enumerate(arcs):
+            self._head[2 * k], self._head[2 * k + 1] = v, u
+            self._capacity[2 * k], self._capacity[2 * k + 1] = c, rc
+            self._start[u + 1] += 1
+            self._start[v + 1] += 1
+        for i in range(n):
+            self._start[i + 1] += self._start[i]
+        self._adj = array('l', [0]) * m
+        fill = self._start[:n]
+        for e in range(m):
+            u = self._head[e ^ 1]
+            self._adj[fill[u]] = e
+            fill[u] += 1
+        self._vertices = None
+        self._index = None
+        self._edge_index = None
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Create the network of the Graph graph, whose edge elements are the capacities; graph is not modified.
+
+        An edge (u, v) of a directed graph is paired with the edge (v, u) if there is one, otherwise its reverse has
+        no capacity. An edge of an undirected graph has its capacity in both directions.
+        """
+        vertices = list(graph.vertices())
+        index = {v: i for i, v in enumerate(vertices)}
+        arcs = []
+        for u in vertices:
+            for e in graph.incident_edges(u):
+                v = e.opposite(u)
+                if graph.is_directed():
+                    reverse = graph.get_edge(v, u)
+                    if reverse is None:
+                        arcs.append((index[u], index[v], e.element(), 0))
+                    elif index[u] < index[v]:
+                        arcs.append((index[u], index[v], e.element(), reverse.element()))
+                elif index[u] < index[v]:
+                    arcs.append((index[u], index[v], e.element(), e.element()))
+        network = cls(len(vertices), arcs)
+        network._vertices = vertices
+        network._index = index
+        return network
+
+    def vertex_count(self):
+        """Return the number of vertices of the network."""
+        return len(self._start) - 1
+
+    def index(self, v):
+        """Return the integer of the Vertex v of the graph the network was built from."""
+        return self._index[v]
+
+    def vertex(self, i):
+        """Return the Vertex of the graph the network was built from whose integer is i."""
+        return self._vertices[i]
+
+    def edge(self, u, v):
+        """Return the edge from u to v (the first one if there are parallel arcs), or None if there is none."""
+        if self._edge_index is None:
+            self._edge_index = dict()
+            for e in reversed(range(len(self._head))):
+                self._edge_index[(self._head[e ^ 1], self._head[e])] = e
+        return self._edge_index.get((u, v))
+
+    def capacity(self, e):
+        """Return the capacity of the edge e."""
+        return self._capacity[e]
+
+    def set_capacity(self, e, capacity, s, t):
+        """Change the capacity of the edge e, keeping the flow from s to t feasible.
+
+        If the flow of e exceeds the new capacity, the overflow is rerouted around e where possible and otherwise
+        cancelled along paths back to s and t, so that the flow is still a valid (not maximum) flow.
+        """
+        if self._capacity.typecode == 'q' and not isinstance(capacity, int):
+            self._capacity = array('d', self._capacity)
+            self._flow = array('d', self._flow)
+        self._capacity[e] = capacity
+        for x in (e, e ^ 1):
+            overflow = self._flow[x] - self._capacity[x]
+            if overflow > 0:
+                self.push(x, -overflow)                 # u keeps overflow units of excess and v misses them
+                u, v = self._head[x ^ 1], self._head[x]
+                if u == v:
+                    continue
+                overflow -= edmonds_karp(self, u, v, overflow)
+                if overflow > 0 and u != s:
+                    edmonds_karp(self, u, s, overflow)
+                if overflow > 0 and v != t:
+                    edmonds_karp(self, t, v, overflow)
+
+    def residual(self, e):
+        """Return the residual capacity of the edge e."""
+        return self._capacity[e] - self._flow[e]
+
+    def push(self, e, delta):
+        """Send delta more units of flow along the edge e."""
+        self._flow[e] += delta
+        self._flow[e ^ 1] -= delta
+
+    def reset(self):
+        """Remove all the flow."""
+        for e in range(len(self._flow)):
+            self._flow[e] = 0
+
+    def flow_value(self, s):
+        """Return the net flow leaving the vertex s."""
+        return sum(self._flow[self._adj[k]] for k in range(self._start[s], self._start[s + 1]))
+
+    def distances(self, s, forward=True):
+        """Return the BFS distance of every vertex from s (-1 if unreachable) moving along the edges with residual
+        capacity, or the distance to s if forward is False."""
+        start, adj, head, capacity, flow = self._start, self._adj, self._head, self._capacity, self._flow
+        dist = [-1] * (len(start) - 1)
+        dist[s] = 0
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            for k in range(start[u], start[u + 1]):
+                e = adj[k]
+                v = head[e]
+                if not forward:
+                    e ^= 1
+                if dist[v] < 0 and capacity[e] > flow[e]:
+                    dist[v] = dist[u] + 1
+                    queue.append(v)
+        return dist
+
+    def source_side(self, s):
+        """Return the sorted list of the vertices reachable from s in the residual network: after a maximum flow it is
+        the smallest source side of a minimum cut."""
+        return [v for v, d in enumerate(self.distances(s)) if d >= 0]
+
+
+def _record(stats, **counters):
+    """Add the counters to the ones already in the dict stats (list counters are extended)"""
+    for key, value in counters.items():
+        stats[key] = stats.get(key, type(value)()) + value
+
+
+def edmonds_karp(network, s, t, limit=None, stats=None):
+    """ Augment the flow of the network from s to t until it is maximum, along
+        shortest augmenting paths found by BFS (Edmonds-Karp)
+
+    Args:
+        network (ResidualNetwork): Network, possibly with a flow already
+        s (int): Source vertex
+        t (int): Sink vertex
+        limit (int): Stop when this amount of flow has been added, if given
+        stats (dict): Dictionary where the number of augmenting paths and the list of
+            the vertices expanded by every BFS are added, if given
+
+    Returns:
+        (int): Value of the added flow
+    """
+    start, adj, head, capacity, flow = network._start, network._adj, network._head, network._capacity, network._flow
+    value = 0
+    paths = 0
+    expansions = []
+    while limit is None or value < limit:
+        parent = [-1] * network.vertex_count()          # edge that discovered every vertex
+        parent[s] = len(adj)
+        queue = deque([s])
+        while queue and parent[t] < 0:
+            u = queue.popleft()
+            for k in range(start[u], start[u + 1]):
+                e = adj[k]
+                v = head[e]
+                if parent[v] < 0 and capacity[e] > flow[e]:
+                    parent[v] = e
+                    queue.append(v)
+        if stats is not None:
+            expansions.append(len(parent) - parent.count(-1) - len(queue))
+        if parent[t] < 0:
+            break
+        path = []
+        v = t
+        while v != s:
+            path.append(parent[v])
+            v = head[parent[v] ^ 1]
+        bottleneck = min(capacity[e] - flow[e] for e in path)
+        if limit is not None:
+            bottleneck = min(bottleneck, limit - value)
+        for e in path:
+            flow[e] += bottleneck
+            flow[e ^ 1] -= bottleneck
+        value += bottleneck
+        paths += 1
+    if stats is not None:
+        _record(stats, augmenting_paths=paths, bfs_expansions=expansions)
+    return value
+
+
+def dinic(network, s, t, stats=None):
+    """ Augment the flow of the network from s to t until it is maximum with Dinic's
+        algorithm: BFS level graph and blocking flow found by an iterative DFS with
+        current-arc pointers
+
+    Args:
+        network (ResidualNetwork): Network, possibly with a flow already
+        s (int): Source vertex
+        t (int): Sink vertex
+        stats (dict): Dictionary where the number of augmenting paths and the list of
+            the vertices expanded by every BFS are added, if given
+
+    Returns:
+        (int): Value of the added flow
+    """
+    start, adj, head, capacity, flow = network._start, network._adj, network._head, network._capacity, network._flow
+    n = network.vertex_count()
+    value = 0
+    paths = 0
+    expansions = []
+    while True:
+        level = network.distances(s)
+        if stats is not None:
+            expansions.append(n - level.count(-1))
+        if level[t] < 0:
+            if stats is not None:
+                _record(stats, augmenting_paths=paths, bfs_expansions=expansions)
+            return value
+        current = start[:n]
+        path = []                                       # edges of the current DFS path from s
+        u = s
+        while True:
+            if u == t:
+                k = min(range(len(path)), key=lambda i: capacity[path[i]] - flow[path[i]])
+                bottleneck = capacity[path[k]] - flow[path[k]]
+                for e in path:
+                    flow[e] += bottleneck
+                    flow[e ^ 1] -= bottleneck
+                value += bottleneck
+                paths += 1
+                del path[k:]                            # retreat to the first saturated edge
+                u = head[path[-1]] if path else s
+                continue
+            while current[u] < start[u + 1]:            # advance along an admissible edge
+                e = adj[current[u]]
+                v = head[e]
+                if capacity[e] > flow[e] and level[v] == level[u] + 1:
+                    break
+                current[u] += 1
+            if current[u] < start[u + 1]:
+                path.append(e)
+                u = v
+            elif u == s:
+                break
+            else:
+                level[u] = -1                           # dead end: u is removed from the level graph
+                e = path.pop()
+                u = head[e ^ 1]
+                current[u] += 1
+
+
+def push_relabel(network, s, t, stats=None):
+    """ Augment the flow of the network from s to t until it is maximum with the
+        highest-label push-relabel algorithm, using the gap heuristic and periodic
+        global relabeling by reverse BFS
+
+    Args:
+        network (ResidualNetwork): Network, possibly with a flow already
+        s (int): Source vertex
+        t (int): Sink vertex
+        stats (dict): Dictionary where the numbers of pushes, relabels, global
+            relabels and gaps are added, if given
+
+    Returns:
+        (int): Value of the added flow
+    """
+    start, adj, head, capacity, flow = network._start, network._adj, network._head, network._capacity, network._flow
+    n = network.vertex_count()
+    counters = [0, 0, 0, 0]                             # pushes, relabels, global relabels, gaps
+    height = [0] * n
+    excess = [0] * n
+    current = start[:n]
+    buckets = [[] for _ in range(2 * n + 1)]            # active vertices by height
+    count = [0] * (2 * n + 1)                           # vertices by height
+
+    def global_relabel():
+        """Set every height to the distance to t, or to n plus the distance to s if t is unreachable"""
+        counters[2] += 1
+        to_t = network.distances(t, False)
+        to_s = network.distances(s, False)
+        for i in range(len(count)):
+            count[i] = 0
+            buckets[i] = []
+        for v in range(n):
+            if v == s:
+                height[v] = n
+            elif to_t[v] >= 0:
+                height[v] = to_t[v]
+            elif to_s[v] >= 0:
+                height[v] = n + to_s[v]
+            else:
+                height[v] = 2 * n
+            count[height[v]] += 1
+            current[v] = start[v]
+            if excess[v] > 0 and v != s and v != t:
+                buckets[height[v]].append(v)
+
+    for k in range(start[s], start[s + 1]):             # saturate the edges leaving s
+        e = adj[k]
+        delta = capacity[e] - flow[e]
+        if delta > 0:
+            flow[e] += delta
+            flow[e ^ 1] -= delta
+            excess[head[e]] += delta
+            excess[s] -= delta
+    global_relabel()
+    top = 2 * n
+    relabels = 0
+    while top >= 0:
+        if not buckets[top]:
+            top -= 1
+            continue
+        u = buckets[top].pop()
+        if height[u] != top or excess[u] == 0:
+            continue
+        while excess[u] > 0:                            # discharge u
+            if current[u] == start[u + 1]:              # relabel u
+                old = height[u]
+                new = 2 * n
+                for k in range(start[u], start[u + 1]):
+                    e = adj[k]
+                    if capacity[e] > flow[e] and height[head[e]] + 1 < new:
+                        new = height[head[e]] + 1
+                count[old] -= 1
+                height[u] = new
+                count[new] += 1
+                current[u] = start[u]
+                relabels += 1
+                counters[1] += 1
+                if count[old] == 0 and old < n:         # gap: the vertices above old can not reach t
+                    counters[3] += 1
+                    for v in range(n):
+                        if old < height[v] < n:
+                            count[height[v]] -= 1
+                            height[v] = n + 1
+                            count[n + 1] += 1
+                            current[v] = start[v]
+                            if excess[v] > 0 and v != u:
+                                buckets[n + 1].append(v)
+                    top = max(top, n + 1)
+                if height[u] >= 2 * n:
+                    break
+                continue
+            e = adj[current[u]]
+            v = head[e]
+            if capacity[e] > flow[e] and height[u] == height[v] + 1:
+                delta = min(excess[u], capacity[e] - flow[e])
+                flow[e] += delta
+                flow[e ^ 1] -= delta
+                excess[u] -= delta
+                counters[0] += 1
+                if excess[v] == 0 and v != s and v != t:
+                    buckets[height[v]].append(v)
+                excess[v] += delta
+            else:
+                current[u] += 1
+        if relabels >= n:                               # periodic global relabeling
+            relabels = 0
+            global_relabel()
+            top = 2 * n
+        else:
+            if excess[u] > 0:
+                buckets[height[u]].append(u)
+            top = max(top, height[u])                   # u and the vertices it pushed to may be above top
+    if stats is not None:
+        _record(stats, pushes=counters[0], relabels=counters[1], global_relabels=counters[2], gaps=counters[3])
+    return excess[t]
+
+
+ENGINES = {"edmonds_karp": edmonds_karp, "dinic": dinic, "push_relabel": push_relabel}
@@ -1,37 +1,203 @@
-from personal_collections.heap_priority_queue import HeapPriorityQueue
+import multiprocessing
+import os
+import time
+from bisect import insort
+from collections import deque
+from heapq import nsmallest
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from personal_collections.adaptable_heap_priority_queue import AdaptableHeapPriorityQueue
+from personal_collections.seed_filter import SeedFilter
+from personal_collections.suffix_array import SuffixArrayIndex
 from personal_collections.suffix_tree import SuffixTree
 
 
+_worker_index = None
+_worker_threshold = None
+_worker_seeds = None
+_worker_strands = False
+
+
+def _init_worker(index, threshold, seeds, both_strands):
+    """Keep in the worker process the read-only index of s and seed filter (inherited copy-on-write when the pool
+    forks)"""
+    global _worker_index, _worker_threshold, _worker_seeds, _worker_strands
+    _worker_index = index
+    _worker_threshold = threshold
+    _worker_seeds = seeds
+    _worker_strands = both_strands
+
+
+def _score(index, threshold, seeds, both_strands, c):
+    """Return the degree of contamination of s by the contaminant c, or the couple of the degrees of c and of its
+    reverse complement if both_strands, or None if the seed filter rejects c"""
+    if seeds is not None and not seeds.may_match(c[1]):
+        return None
+    if both_strands:
+        return index._common_maximal_substrings_strands(c[1], threshold)
+    return index._common_maximal_substrings(c[1], threshold)
+
+
+def _score_batch(batch):
+    """Return the degrees of contamination of the contaminants in batch"""
+    return [_score(_worker_index, _worker_threshold, _worker_seeds, _worker_strands, c) for c in batch]
+
+
 class DNAContamination():
 
     # ------------------------------- DNAContamination concrete methods -------------------------------
 
-    def __init__(self, s, l):
-        """Create an initially empty DNAContamination"""
+    def __init__(self, s, l, backend="suffix_tree", top=100, packed=False, stats=False, prefilter=True,
+                 both_strands=False):
+        """Create an initially empty DNAContamination, counting the common maximal substrings of length at least l >= 1
+        backend selects the index of s: "suffix_tree" (SuffixTree) or "suffix_array" (SuffixArrayIndex); with packed
+        the SuffixTree keeps s with 2 bits per base
+        The top >= 1 contaminants with larger degree of contamination are kept sorted to answer getContaminants
+        A contaminant whose id was already added replaces the previous one, and its degree of contamination is revised
+        With prefilter a SeedFilter of the l-mers of s is built, and the contaminants sharing none of them are given
+        degree 0 without searching the index
+        With both_strands the reverse complement of every contaminant is scored too, in the same pass: the degree of
+        contamination is the sum of the degrees of the two strands, which are returned by getStrandCounts
+        If stats is True the counters and timers are kept in the dict self.stats, whose "index" item is the stats of
+        the SuffixTree (its scoring counters only cover the contaminants scored in this process)"""
+        if l < 1:
+            raise ValueError('l must be at least 1')
+        if top < 1:
+            raise ValueError('top must be at least 1')
+        started = time.perf_counter()
         self._threshold = l
         self._string = s
         self.C = []
-        self._heap = HeapPriorityQueue()
-        self.suffix_tree = SuffixTree([s])
+        self._heap = AdaptableHeapPriorityQueue()  # keys (-degree, insertion number), values contaminant ids
+        self._entries = dict()  # contaminant id -> (insertion number, locator in the heap or None)
+        self._top_size = top
+        self._top = []  # (-degree, insertion number, contaminant id) sorted, at most top items; None to rebuild
+        if backend == "suffix_tree":
+            self._index = SuffixTree([s], packed=packed, stats=stats)
+        elif backend == "suffix_array":
+            self._index = SuffixArrayIndex(s)
+        else:
+            raise ValueError('backend must be "suffix_tree" or "suffix_array"')
+        self.suffix_tree = self._index if backend == "suffix_tree" else None
+        self._both_strands = both_strands
+        self._strand_counts = dict() if both_strands else None  # contaminant id -> (forward degree, reverse degree)
+        self._seeds = SeedFilter(s, l, both_strands) if prefilter else None
+        self.stats = None
+        if stats:
+            self.stats = {
+                "index_seconds": time.perf_counter() - started,
+                "contaminants": 0,
+                "contaminating": 0,  # contaminants with a positive degree of contamination
+                "revised": 0,  # contaminants whose id was already added
+                "prefiltered": 0,  # contaminants rejected by the seed filter
+                "add_seconds": 0.0,
+                "query_seconds": 0.0,
+                "index": getattr(self._index, "stats", None),
+            }
+
+    def _add_scored(self, c, commons):
+        """Add the contaminant c, whose degree of contamination is commons (a couple of degrees with both strands, None
+        if c was rejected by the seed filter), to the set C, to the heap and to the top contaminants; if its id was
+        already added, its entries are updated in place"""
+        if commons is None:
+            commons = (0, 0) if self._both_strands else 0
+            if self.stats is not None:
+                self.stats["prefiltered"] += 1
+        if self._both_strands:
+            self._strand_counts[c[0]] = commons
+            commons = commons[0] + commons[1]
+        entry = self._entries.get(c[0])
+        if entry is None:
+            number, locator = len(self.C), None
+            self.C.append(c)
+        else:
+            number, locator = entry
+            self.C[number] = c
+            if locator is not None and self._top is not None and locator._key <= self._top[-1][:2]:
+                self._top = None  # the old degree was among the top ones, which are rebuilt when needed
+        if self.stats is not None:
+            self.stats["contaminants"] += 1
+            self.stats["contaminating"] += commons != 0
+            self.stats["revised"] += entry is not None
+        key = (-commons, number)
+        if (commons != 0):
+            if locator is None:
+                locator = self._heap.add(key, c[0])
+            else:
+                self._heap.update(locator, key, c[0])
+            if self._top is not None and (len(self._top) < self._top_size or key < self._top[-1][:2]):
+                insort(self._top, (-commons, number, c[0]))
+                if len(self._top) > self._top_size:
+                    self._top.pop()
+        elif locator is not None:
+            self._heap.remove(locator)
+            locator = None
+        self._entries[c[0]] = (number, locator)
 
     def addContaminant(self, c):
         """Add the contaminant c to the set C and saves the degree of contamination of s by c"""
-        self.C.append(c)
-        commons = self.suffix_tree._common_maximal_substrings(c[1], self._threshold)
-        if (commons != 0):
-            self._heap.add(-commons, c[0])
+        started = time.perf_counter() if self.stats is not None else 0
+        self._add_scored(c, _score(self._index, self._threshold, self._seeds, self._both_strands, c))
+        if self.stats is not None:
+            self.stats["add_seconds"] += time.perf_counter() - started
+
+    def addContaminants(self, contaminants, workers=None, batch_size=1000):
+        """Add every contaminant of the iterable contaminants, scoring them in batches on a pool of workers processes
+        (all the cpus if workers is None); the results are added in the same order of contaminants"""
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+        if workers is not None and workers < 1:
+            raise ValueError('workers must be at least 1')
+        contaminants = iter(contaminants)
+        if workers is None:
+            workers = os.cpu_count()
+        if workers == 1:
+            for c in contaminants:
+                self.addContaminant(c)
+            return
+        started = time.perf_counter() if self.stats is not None else 0
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(self._index, self._threshold, self._seeds, self._both_strands)) as executor:
+            pending = deque()  # at most 2 batches in flight per worker, so that contaminants are read lazily
+            while True:
+                while len(pending) < 2 * workers:
+                    batch = list(islice(contaminants, batch_size))
+                    if len(batch) == 0:
+                        break
+                    pending.append((batch, executor.submit(_score_batch, batch)))
+                if len(pending) == 0:
+                    break
+                batch, future = pending.popleft()
+                for c, commons in zip(batch, future.result()):
+                    self._add_scored(c, commons)
+        if self.stats is not None:
+            self.stats["add_seconds"] += time.perf_counter() - started
+
+    def getScoredContaminants(self, k):
+        """Return the couples (contaminant, degree of contamination) of the k contaminants with larger degree of
+        contamination among the added contaminants, without modifying them (none if k <= 0)"""
+        k = max(k, 0)
+        started = time.perf_counter() if self.stats is not None else 0
+        if self._top is None:
+            self._top = [item._key + (item._value,) for item in nsmallest(self._top_size, self._heap.locators())]
+        if k <= self._top_size or len(self._top) < self._top_size:
+            scored = [(item[2], -item[0]) for item in self._top[:k]]
+        else:
+            scored = [(item._value, -item._key[0]) for item in nsmallest(k, self._heap.locators())]
+        if self.stats is not None:
+            self.stats["query_seconds"] += time.perf_counter() - started
+        return scored
+
+    def getStrandCounts(self, contaminant_id):
+        """Return the degrees of contamination (forward strand, reverse complement) of the contaminant with the given
+        id; the DNAContamination must have been created with both_strands"""
+        if self._strand_counts is None:
+            raise ValueError('the strands are scored only with both_strands')
+        return self._strand_counts[contaminant_id]
 
     def getContaminants(self, k):
         """Return the k contaminants with larger degree of contamination among the added contaminants"""
-        app = []
-        contaminants = []
-        for i in range(k):
-            try:
-                cont = self._heap.remove_min()
-                contaminants.append(cont[1])
-                app.append(cont)
-            except:
-                break
-        for a in app:
-            self._heap.add(a[0], a[1])
-        return contaminants
+        return [c for c, degree in self.getScoredContaminants(k)]
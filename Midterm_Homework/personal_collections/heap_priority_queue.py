@@ -49,28 +49,48 @@ class HeapPriorityQueue(PriorityQueueBase):  # base class defines _Item
         """Swap the elements at indices i and j of array."""
         self._data[i], self._data[j] = self._data[j], self._data[i]
 
+    def _place(self, j, item):
+        """Put item at index j of array."""
+        self._data[j] = item
+
     def _upheap(self, j):
-        parent = self._parent(j)
-        if j > 0 and self._data[j] < self._data[parent]:
-            self._swap(j, parent)
-            self._upheap(parent)  # recur at position of parent
+        item = self._data[j]
+        while j > 0:  # move the parents down until the position of item is found
+            parent = (j - 1) // 2
+            if not item < self._data[parent]:
+                break
+            self._place(j, self._data[parent])
+            j = parent
+        self._place(j, item)
 
     def _downheap(self, j):
-        if self._has_left(j):
-            left = self._left(j)
-            small_child = left  # although right may be smaller
-            if self._has_right(j):
-                right = self._right(j)
-                if self._data[right] < self._data[left]:
-                    small_child = right
-            if self._data[small_child] < self._data[j]:
-                self._swap(j, small_child)
-                self._downheap(small_child)  # recur at position of small child
+        data = self._data
+        n = len(data)
+        item = data[j]
+        while 2 * j + 1 < n:  # move the smaller children up until the position of item is found
+            small_child = 2 * j + 1  # although right may be smaller
+            if small_child + 1 < n and data[small_child + 1] < data[small_child]:
+                small_child += 1
+            if not data[small_child] < item:
+                break
+            self._place(j, data[small_child])
+            j = small_child
+        self._place(j, item)
+
+    def _heapify(self):
+        """Make the array a heap bottom-up, in linear time."""
+        for j in range(self._parent(len(self._data) - 1), -1, -1):  # from the last parent to the root
+            self._downheap(j)
 
     # ------------------------------ public behaviors ------------------------------
-    def __init__(self):
-        """Create a new empty Priority Queue."""
-        self._data = []
+    def __init__(self, contents=()):
+        """Create a new Priority Queue, by default empty.
+
+        If contents is given, it is an iterable of (k,v) tuples and the heap is built bottom-up in linear time.
+        """
+        self._data = [self._Item(k, v) for k, v in contents]
+        if len(self._data) > 1:
+            self._heapify()
 
     def __len__(self):
         """Return the number of items in the priority queue."""
@@ -100,5 +120,6 @@ class HeapPriorityQueue(PriorityQueueBase):  # base class defines _Item
             raise Empty('Priority queue is empty.')
         self._swap(0, len(self._data) - 1)  # put minimum item at the end
         item = self._data.pop()  # and remove it from the list;
-        self._downheap(0)  # then fix new root
+        if len(self._data) > 0:
+            self._downheap(0)  # then fix new root
         return (item._key, item._value)
@@ -0,0 +1,127 @@
+import re
+from bisect import bisect_left
+
+
+class PackedSequence:
+    """DNA sequence stored with 2 bits per base (A, C, G, T) in a bytearray; any other character (N, $, ...) is kept
+    apart as an exception"""
+
+    _CODES = str.maketrans("ACGT", "\x00\x01\x02\x03")
+    _COMPLEMENT_CODES = str.maketrans("ACGT", "\x03\x02\x01\x00")
+    _BASES = bytes.maketrans(b"\x00\x01\x02\x03", b"ACGT")
+    _OTHER = re.compile("[^ACGT]")
+    _WORD = 32  # number of bases compared at once by match_length
+
+    def __init__(self, s, reverse=False):
+        """Create the packed sequence of the string s, or of its reverse complement if reverse is True (the characters
+        other than A, C, G and T are their own complement)"""
+        self._length = len(s)
+        last = len(s) - 1 if reverse else 0
+        self._exceptions = {abs(last - m.start()): m.group() for m in self._OTHER.finditer(s)}
+        self._positions = sorted(self._exceptions)
+        codes = self._OTHER.sub("A", s).translate(self._COMPLEMENT_CODES if reverse else self._CODES).encode("latin-1")
+        if reverse:
+            codes = codes[::-1]
+        codes += bytes(-len(codes) % 4)
+        packed = 0
+        for k in range(4):  # the base 4 * i + k goes in the bits 2k and 2k + 1 of the byte i
+            packed |= int.from_bytes(codes[k::4], "little") << (2 * k)
+        self._data = packed.to_bytes(len(codes) // 4 + 9, "little")  # padding to read a word anywhere
+
+    def __len__(self):
+        """Return the number of bases of the sequence"""
+        return self._length
+
+    def __getitem__(self, i):
+        """Return the character at index i, or the string of the slice i"""
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._length)
+            return self._decode(start, stop)[::step] if start < stop else ""
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError('sequence index out of range')
+        c = self._exceptions.get(i)
+        if c is not None:
+            return c
+        return "ACGT"[self._data[i >> 2] >> ((i & 3) << 1) & 3]
+
+    def __str__(self):
+        """Return the sequence as a string"""
+        return self._decode(0, self._length)
+
+    def _decode(self, start, stop):
+        """Return the string of the bases from start to stop (start < stop)"""
+        word = self._word(start, stop - start)
+        n = (stop - start + 3) // 4
+        codes = bytearray(4 * n)
+        mask = int.from_bytes(b"\x03" * n, "little")
+        for k in range(4):
+            codes[k::4] = (word >> (2 * k) & mask).to_bytes(n, "little")
+        chars = list(codes[:stop - start].translate(self._BASES).decode())
+        for p in self._positions[bisect_left(self._positions, start):bisect_left(self._positions, stop)]:
+            chars[p - start] = self._exceptions[p]
+        return "".join(chars)
+
+    def _word(self, i, w):
+        """Return the integer of 2w bits that packs the bases from i to i + w"""
+        first = i >> 2
+        last = (i + w + 3) >> 2
+        return int.from_bytes(self._data[first:last + 1], "little") >> ((i & 3) << 1) & ((1 << 2 * w) - 1)
+
+    def _next_exception(self, i):
+        """Return the index of the first exception at index i or after it (the length if there is none)"""
+        k = bisect_left(self._positions, i)
+        return self._positions[k] if k < len(self._positions) else self._length
+
+    def match_length(self, i, other, j, limit):
+        """Return the number of equal characters (at most limit) of self from index i and of the PackedSequence other
+        from index j, comparing _WORD bases at a time"""
+        k = 0
+        while k < limit:
+            e = limit  # offset of the next exception in one of the sequences
+            if self._positions:
+                e = min(e, self._next_exception(i + k) - i)
+            if other._positions:
+                e = min(e, other._next_exception(j + k) - j)
+            a = self._data
+            b = other._data
+            while k < e:
+                w = min(self._WORD, e - k)
+                p = i + k
+                q = j + k
+                x = (int.from_bytes(a[p >> 2:(p + w + 7) >> 2], "little") >> ((p & 3) << 1) ^
+                     int.from_bytes(b[q >> 2:(q + w + 7) >> 2], "little") >> ((q & 3) << 1)) & ((1 << 2 * w) - 1)
+                if x:
+                    return k + (((x & -x).bit_length() - 1) >> 1)
+                k += w
+            if k == limit or self[i + k] != other[j + k]:
+                return k
+            k += 1
+        return k
+
+
+class ReverseComplement:
+    """Read-only view of the reverse complement of a DNA string, whose characters are computed when they are read; the
+    characters other than A, C, G and T are their own complement"""
+    __slots__ = '_string', '_last'
+
+    _COMPLEMENT = {"A": "T", "C": "G", "G": "C", "T": "A"}
+
+    def __init__(self, s):
+        """Create the view of the reverse complement of the string s"""
+        self._string = s
+        self._last = len(s) - 1
+
+    def __len__(self):
+        """Return the number of characters of the sequence"""
+        return self._last + 1
+
+    def __getitem__(self, i):
+        """Return the character at index i (0 <= i < len)"""
+        c = self._string[self._last - i]
+        return self._COMPLEMENT.get(c, c)
+
+    def __str__(self):
+        """Return the reverse complement as a string"""
+        return "".join(self[i] for i in range(len(self)))
@@ -0,0 +1,52 @@
+from array import array
+from bisect import bisect_left
+from zlib import crc32
+
+
+class SeedFilter:
+    """Set of the substrings of length l (l-mers) of a reference string, used to tell quickly that a string shares no
+    substring of length at least l with it. Every l-mer is kept as its CRC-32 fingerprint: a one-hash bitset with about
+    16 bits per l-mer answers most lookups and a sorted array of the fingerprints confirms the bitset hits, so a string
+    is never rejected if it has a common l-mer, while a false hit only needs two fingerprints to collide."""
+
+    _COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+    def __init__(self, s, l, both_strands=False):
+        """Create the filter of the l-mers of the string s (l >= 1)
+        If both_strands is True the l-mers of the reverse complement of s are added too, so that a string is also
+        passed when its reverse complement has an l-mer in common with s"""
+        self._length = l
+        self._encoding = "ascii" if s.isascii() else "utf-32-le"
+        self._width = 1 if self._encoding == "ascii" else 4  # bytes per character
+        step, size = self._width, self._width * l
+        fingerprints = set()
+        for strand in ((s, s[::-1].translate(self._COMPLEMENT)) if both_strands else (s,)):
+            data = strand.encode(self._encoding)
+            fingerprints.update(crc32(data[i:i + size]) for i in range(0, len(data) - size + 1, step))
+        fingerprints = sorted(fingerprints)
+        self._fingerprints = array("I", fingerprints)
+        bits = 1 << max(3, (16 * len(fingerprints)).bit_length())
+        self._mask = bits - 1
+        self._bits = bytearray(bits >> 3)
+        for h in fingerprints:
+            h &= self._mask
+            self._bits[h >> 3] |= 1 << (h & 7)
+
+    def __len__(self):
+        """Return the number of distinct l-mer fingerprints of the reference"""
+        return len(self._fingerprints)
+
+    def may_match(self, c):
+        """Return False if the string c has no substring of length l in common with the reference, True if it may have
+        one"""
+        data = c.encode(self._encoding, "replace")  # a replaced character can only cause a false hit
+        step, size = self._width, self._width * self._length
+        bits, mask, fingerprints = self._bits, self._mask, self._fingerprints
+        n = len(fingerprints)
+        for i in range(0, len(data) - size + 1, step):
+            h = crc32(data[i:i + size])
+            if bits[(h & mask) >> 3] >> (h & 7) & 1:
+                j = bisect_left(fingerprints, h)
+                if j < n and fingerprints[j] == h:
+                    return True
+        return False
@@ -0,0 +1,77 @@
+import gzip
+import mmap
+
+
+def _lines(f):
+    """Generate the lines of the binary file f without the line terminators, through mmap if f is on a local disk"""
+    source = f
+    if not isinstance(f, gzip.GzipFile):
+        try:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # empty file or not mappable
+            pass
+    try:
+        for line in iter(source.readline, b""):
+            yield line.rstrip(b"\r\n")
+    finally:
+        if source is not f:
+            source.close()
+
+
+def _open(path):
+    """Open the file at path in binary mode, decompressing it if it is gzip compressed"""
+    f = open(path, "rb")
+    if f.read(2) == b"\x1f\x8b":
+        f.close()
+        return gzip.open(path, "rb")
+    f.seek(0)
+    return f
+
+
+def _fasta(first, lines):
+    """Generate the (header, sequence) couples of a FASTA file whose first header line is first"""
+    header = first
+    sequence = []
+    for line in lines:
+        if line.startswith(b">"):
+            yield header[1:].decode().strip(), b"".join(sequence).decode()
+            header = line
+            sequence = []
+        else:
+            sequence.append(line.strip())
+    yield header[1:].decode().strip(), b"".join(sequence).decode()
+
+
+def _fastq(first, lines):
+    """Generate the (header, sequence) couples of a FASTQ file whose first header line is first"""
+    header = first
+    while header is not None:
+        sequence = []
+        for line in lines:
+            if line.startswith(b"+"):
+                break
+            sequence.append(line.strip())
+        sequence = b"".join(sequence)
+        quality = 0
+        for line in lines:
+            quality += len(line.strip())
+            if quality >= len(sequence):
+                break
+        yield header[1:].decode().strip(), sequence.decode()
+        header = next((line for line in lines if line.strip()), None)
+
+
+def read_sequences(path):
+    """Generate the (header, sequence) couples of the FASTA or FASTQ file at path, also gzip compressed
+    Only one record at a time is kept in memory and sequences can be wrapped on several lines"""
+    with _open(path) as f:
+        lines = _lines(f)
+        first = next((line for line in lines if line.strip()), None)
+        if first is None:
+            return
+        if first.startswith(b">"):
+            yield from _fasta(first, lines)
+        elif first.startswith(b"@"):
+            yield from _fastq(first, lines)
+        else:
+            raise ValueError('the file is neither FASTA nor FASTQ')
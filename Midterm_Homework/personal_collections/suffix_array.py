@@ -0,0 +1,159 @@
+from array import array
+
+
+class SuffixArrayIndex:
+    """Enhanced suffix array (suffix array, LCP array and child table) of a string, that answers the same queries of
+    the SuffixTree using a few int32 arrays"""
+
+    _COMPLEMENT = bytes.maketrans(b"ACGT", b"TGCA")
+
+    # ------------------------------- SuffixArrayIndex construction -------------------------------
+
+    def _suffix_array(self, text):
+        """Return the suffix array of text (bytes) built by prefix doubling"""
+        n = len(text)
+        sa = sorted(range(n), key=text.__getitem__)
+        rank = list(text)
+        base = max(n, 256) + 1
+        k = 1
+        while True:
+            key = [rank[i] * base + (rank[i + k] + 1 if i + k < n else 0) for i in range(n)]
+            sa.sort(key=key.__getitem__)
+            r = 0
+            rank[sa[0]] = 0
+            for i in range(1, n):
+                if key[sa[i]] != key[sa[i - 1]]:
+                    r += 1
+                rank[sa[i]] = r
+            if r == n - 1:
+                return array("i", sa)
+            k *= 2
+
+    def _lcp(self, text, sa):
+        """Return the LCP array of text built with Kasai's algorithm, where lcp[i] is the length of the longest common
+        prefix of the suffixes sa[i - 1] and sa[i] and lcp[0] = lcp[n] = -1"""
+        n = len(text)
+        rank = array("i", bytes(4 * n))
+        for i in range(n):
+            rank[sa[i]] = i
+        lcp = array("i", bytes(4 * (n + 1)))
+        lcp[0] = lcp[n] = -1
+        h = 0
+        for i in range(n):
+            r = rank[i]
+            if r > 0:
+                j = sa[r - 1]
+                while i + h < n and j + h < n and text[i + h] == text[j + h]:
+                    h += 1
+                lcp[r] = h
+                if h > 0:
+                    h -= 1
+            else:
+                h = 0
+        return lcp
+
+    def _child_table(self, lcp):
+        """Return the up, down and next l-index arrays of the child table (Abouelhoda, Kurtz and Ohlebusch)"""
+        n = len(lcp) - 1
+        up = array("i", [-1]) * (n + 1)
+        down = array("i", [-1]) * (n + 1)
+        nxt = array("i", [-1]) * (n + 1)
+        last = -1
+        stack = [0]
+        for i in range(1, n + 1):
+            while lcp[i] < lcp[stack[-1]]:
+                last = stack.pop()
+                top = stack[-1]
+                if lcp[i] <= lcp[top] and lcp[top] != lcp[last]:
+                    down[top] = last
+            if last != -1:
+                up[i] = last
+                last = -1
+            stack.append(i)
+        stack = [0]
+        for i in range(1, n + 1):
+            while lcp[i] < lcp[stack[-1]]:
+                stack.pop()
+            if lcp[i] == lcp[stack[-1]]:
+                nxt[stack.pop()] = i
+            stack.append(i)
+        return up, down, nxt
+
+    def __init__(self, s):
+        """Create the enhanced suffix array of the string s"""
+        self._string = s
+        self._text = (s + "$").encode("ascii")
+        self._sa = self._suffix_array(self._text)
+        self._lcp_array = self._lcp(self._text, self._sa)
+        self._up, self._down, self._next = self._child_table(self._lcp_array)
+
+    def __len__(self):
+        """Return the number of suffixes in the index"""
+        return len(self._sa)
+
+    # ------------------------------- lcp-interval traversal -------------------------------
+
+    def _first_l_index(self, i, j):
+        """Return the first l-index of the lcp-interval [i..j] (i < j)"""
+        up = self._up[j + 1]
+        return up if i < up <= j else self._down[i]
+
+    def _interval_depth(self, i, j):
+        """Return the length of the common prefix of the suffixes in the interval [i..j]"""
+        if i == j:
+            return len(self._text) - self._sa[i]
+        return self._lcp_array[self._first_l_index(i, j)]
+
+    def _child_interval(self, i, j, depth, c):
+        """Return the child interval of the lcp-interval [i..j] of the given depth whose suffixes continue with the
+        byte c, or None"""
+        text = self._text
+        sa = self._sa
+        k = self._first_l_index(i, j)
+        while True:
+            if text[sa[i] + depth] == c:
+                return i, k - 1
+            i = k
+            k = self._next[k]
+            if k == -1 or k > j or self._lcp_array[k] != depth:
+                break
+        return (i, j) if text[sa[i] + depth] == c else None
+
+    def _match_length(self, c, i):
+        """Return the length of the longest prefix of c[i:] (bytes) that occurs in the indexed string"""
+        text = self._text
+        sa = self._sa
+        lb, rb = 0, len(sa) - 1
+        m = 0
+        j = i
+        while True:
+            depth = self._interval_depth(lb, rb)
+            pos = sa[lb]
+            while m < depth and j < len(c) and text[pos + m] == c[j]:
+                m += 1
+                j += 1
+            if m < depth or j == len(c):
+                return m
+            interval = self._child_interval(lb, rb, depth, c[j])
+            if interval is None:
+                return m
+            lb, rb = interval
+
+    def _common_maximal_substrings(self, c, l):
+        """Return the number of common maximal substring"""
+        if isinstance(c, str):
+            c = c.encode("ascii")
+        n_comm = 0
+        prev = -1
+        for i in range(len(c) - l + 1):
+            j = i + self._match_length(c, i)
+            if j > prev and j - i >= l:
+                n_comm += 1
+                prev = j
+        return n_comm
+
+    def _common_maximal_substrings_strands(self, c, l):
+        """Return the numbers of common maximal substrings of c and of its reverse complement"""
+        c = c.encode("ascii")
+        return (self._common_maximal_substrings(c, l),
+                self._common_maximal_substrings(c[::-1].translate(self._COMPLEMENT), l))
@@ -1,22 +1,40 @@
+import struct
+import sys
+import time
+from array import array
+from mmap import ACCESS_READ, mmap as memory_map
+
+from personal_collections.packed_sequence import PackedSequence, ReverseComplement
 from personal_collections.tree import Tree
 
 
 class SuffixTree(Tree):
-    # ------------------------------- nested _Node class -------------------------------
+    """SuffixTree whose nodes are stored column by column in parallel arrays indexed by node id"""
+
+    _DNA = {"A": 0, "C": 1, "G": 2, "T": 3, "$": 4}  # columns of the child table for DNA strings
+    _TERMINATORS = 0xF0000  # unique terminator of the i-th string: chr(_TERMINATORS + i) (private use plane)
+    _EMPTY_ROW = array("i", [-1] * 5)
+    _MAGIC = b"SUFTREE\0"
+    _VERSION = 1
+    _HEADER = struct.Struct("<8s7I4x")  # magic, version, byte order, nodes, size, strings, child table, mark bytes
+    _COLUMNS = ("_sid", "_start", "_end", "_parent", "_depth", "_child", "_next", "_link")
+    _FIELDS = ("sid", "start", "end", "parent", "depth", "link", "mark")  # node values reported by traverse
+
+    # ------------------------------- nested _Marks class -------------------------------
 
-    class _Node:
-        def __init__(self, element, mark, parent, depth):
-            self._children = {}
-            self._element = element
-            self._mark = mark
-            self._parent = parent
-            self._depth = depth
+    class _Marks:
+        """Read-only sequence of the mark bitsets of a loaded SuffixTree, stored as little-endian integers of width
+        bytes"""
 
-        def _add_child(self, child, key):
-            self._children[key] = child
+        def __init__(self, data, width):
+            self._data = data
+            self._width = width
 
-        def _remove_child(self, key):
-            self._children.pop(key)
+        def __getitem__(self, node):
+            return int.from_bytes(self._data[node * self._width:(node + 1) * self._width], "little")
+
+        def __len__(self):
+            return len(self._data) // self._width
 
     # ------------------------------- nested implemented Position class -------------------------------
 
@@ -27,38 +45,172 @@ class SuffixTree(Tree):
 
         def element(self):
             """Return the element stored at this Position."""
-            return self._node._element
+            return self._container._element(self._node)
 
         def __eq__(self, other):
             """Return True if other is a Position representing the same location."""
-            return type(other) is type(self) and other._node is self._node
+            return type(other) is type(self) and other._container is self._container and other._node == self._node
 
     # ------------------------------- implemented Tree abstract methods -------------------------------
 
     def root(self):
         """Return Position representing the alberi's root (or None if empty)."""
-        return self._make_position(self._root)
+        return self._make_position(0)
 
     def parent(self, p):
         """Return Position representing p's parent (or None if p is root)."""
         node = self._validate(p)
-        return self._make_position(node._parent)
+        return self._make_position(self._parent[node])
 
     def num_children(self, p):
         """Return the number of children that Position p has."""
         node = self._validate(p)
-        return len(node._children)
+        return sum(1 for _ in self._children(node))
 
     def children(self, p):
         """Generate an iteration of Positions representing p's children."""
         node = self._validate(p)
-        for child in node._children.values():
+        for child in self._children(node):
             yield self._make_position(child)
 
     def __len__(self):
         """Return the total number of elements in the alberi."""
         return self._size
 
+    # ------------------------------- traversals on the node ids -------------------------------
+
+    def depth(self, p):
+        """Return the number of levels separating Position p from the root."""
+        node = self._validate(p)
+        d = 0
+        while node != 0:
+            node = self._parent[node]
+            d += 1
+        return d
+
+    def _height2(self, p):
+        """Return the height of the subtree rooted at Position p."""
+        top = self._validate(p)
+        height = {}
+        for node in self._postorder_nodes(top):  # the children come before their parent
+            h = height.pop(node, 0)
+            if node == top:
+                return h
+            parent = self._parent[node]
+            height[parent] = max(height.get(parent, 0), h + 1)
+
+    def _subtree_preorder(self, p):
+        """Generate a preorder iteration of positions in subtree rooted at p."""
+        for node in self._preorder_nodes(self._validate(p)):
+            yield self._make_position(node)
+
+    def _subtree_postorder(self, p):
+        """Generate a postorder iteration of positions in subtree rooted at p."""
+        for node in self._postorder_nodes(self._validate(p)):
+            yield self._make_position(node)
+
+    def traverse(self, order="preorder", fields=()):
+        """Generate the ids of all the nodes in preorder or postorder without making a Position for each of them
+        If fields names some of "sid", "start", "end", "parent", "depth", "link" and "mark", generate instead the
+        tuples (id, *values of the fields) of the nodes"""
+        if order not in ("preorder", "postorder"):
+            raise ValueError('order must be "preorder" or "postorder"')
+        if any(f not in self._FIELDS for f in fields):
+            raise ValueError('fields must be among ' + ", ".join(self._FIELDS))
+        nodes = self._preorder_nodes() if order == "preorder" else self._postorder_nodes()
+        if not fields:
+            return nodes
+        columns = [getattr(self, "_" + f) for f in fields]
+        return ((node, *(column[node] for column in columns)) for node in nodes)
+
+    # ------------------------------- columnar node store -------------------------------
+
+    def _new_node(self, sid, start, end, parent, depth, mark):
+        """Append a node to the arrays and return its id"""
+        self._sid.append(sid)
+        self._start.append(start)
+        self._end.append(end)
+        self._parent.append(parent)
+        self._depth.append(depth)
+        self._child.append(-1)
+        self._next.append(-1)
+        self._link.append(-1)
+        self._mark.append(mark)
+        if self._table is not None:
+            self._table.extend(self._EMPTY_ROW)
+        return len(self._start) - 1
+
+    def _element(self, node):
+        """Return the triple (string id, start, end) of the edge entering node (None for the root)"""
+        return [self._sid[node], self._start[node], self._end[node]] if node != 0 else None
+
+    def _first_char(self, node):
+        """Return the first character of the edge entering node"""
+        return self._T[self._sid[node] - 1][self._start[node]]
+
+    def _children(self, node):
+        """Generate the ids of the children of node in insertion order"""
+        child = self._child[node]
+        while child != -1:
+            yield child
+            child = self._next[child]
+
+    def _get_child(self, node, c):
+        """Return the id of the child of node whose edge starts with the character c, or -1"""
+        if self._table is not None:
+            code = self._DNA.get(c)
+            if code is not None:
+                return self._table[5 * node + code]
+        child = self._child[node]
+        while child != -1 and self._first_char(child) != c:
+            child = self._next[child]
+        return child
+
+    def _add_child(self, node, child, c):
+        """Append child to the children of node, c is the first character of its edge"""
+        last = self._child[node]
+        if last == -1:
+            self._child[node] = child
+        else:
+            while self._next[last] != -1:
+                last = self._next[last]
+            self._next[last] = child
+        if self._table is not None and c in self._DNA:
+            self._table[5 * node + self._DNA[c]] = child
+
+    def _replace_child(self, node, old, new, c):
+        """Put new in the place of the child old of node, c is the first character of their edges"""
+        self._next[new] = self._next[old]
+        self._next[old] = -1
+        if self._child[node] == old:
+            self._child[node] = new
+        else:
+            prev = self._child[node]
+            while self._next[prev] != old:
+                prev = self._next[prev]
+            self._next[prev] = new
+        if self._table is not None and c in self._DNA:
+            self._table[5 * node + self._DNA[c]] = new
+
+    def _move_children(self, node, new):
+        """Move all the children of node under new, that has no children"""
+        self._child[new] = self._child[node]
+        self._child[node] = -1
+        for child in self._children(new):
+            self._parent[child] = new
+        if self._table is not None:
+            row = 5 * node
+            self._table[5 * new:5 * new + 5] = self._table[row:row + 5]
+            self._table[row:row + 5] = self._EMPTY_ROW
+
+    def _is_terminator(self, c):
+        """Return True if the character c terminates a string of the SuffixTree"""
+        return c == "$" or ord(c) >= self._TERMINATORS
+
+    def _marks(self, mark):
+        """Return the tuple of string ids stored in the bitset mark"""
+        return tuple(i + 1 for i in range(mark.bit_length()) if mark >> i & 1)
+
     # ------------------------------- SuffixTree concrete methods -------------------------------
 
     def _generate_suffixes(self, word):
@@ -68,7 +220,7 @@ class SuffixTree(Tree):
 
     def _to_string(self, element):
         """Return the string that corresponds to the element"""
-        return (self._S[element[0] - 1] + "$")[element[1]:element[2]]
+        return self._T[element[0] - 1][element[1]:element[2]]
 
     def _check_prefix(self, s1, s2):
         """Check if s1 and s2 have a common prefix and return it's number of characters"""
@@ -77,161 +229,449 @@ class SuffixTree(Tree):
                 return i
         return min(len(s1), len(s2))
 
-    def _check_prefix_in_dict(self, dict, word):
-        """Check if a suffix in the suffixes array has a common prefix with the word and return the first letter of the
-        word and the number of common characters"""
-        x = dict.get(word[0])
-        if x is not None:
-            num = self._check_prefix(word, self._to_string(x._element))
+    def _check_prefix_in_node(self, node, word):
+        """Check if the edge of a child of node has a common prefix with the word and return the id of the child and
+        the number of common characters"""
+        x = self._get_child(node, word[0])
+        if x != -1:
+            num = self._check_prefix(word, self._to_string(self._element(x)))
             if num != 0:
-                return word[0], num
-        return None, None
+                return x, num
+        return -1, None
 
     def _add_suffix(self, triple_suffix):
         """Add the triple_suffix (suffix consisting of 3 numbers) in the SuffixTree and update all parameters"""
         suffix = self._to_string(triple_suffix)
-        root = self._root
+        bit = 1 << (triple_suffix[0] - 1)
+        root = 0
         if len(suffix) != 0:
-            first_letter, n_chars = self._check_prefix_in_dict(root._children, suffix)
-            while first_letter is not None and n_chars == root._children[first_letter]._element[2] - \
-                    root._children[first_letter]._element[1]:
-                root = root._children[first_letter]
+            child, n_chars = self._check_prefix_in_node(root, suffix)
+            while child != -1 and n_chars == self._end[child] - self._start[child]:
+                root = child
                 suffix = suffix[n_chars:]
                 triple_suffix[1] += n_chars
-                if triple_suffix[0] not in root._mark:
-                    root._mark.append(triple_suffix[0])
+                self._mark[root] |= bit
                 if len(suffix) != 0:
-                    first_letter, n_chars = self._check_prefix_in_dict(root._children, suffix)
+                    child, n_chars = self._check_prefix_in_node(root, suffix)
                 else:
                     break
             if len(suffix) != 0:
-                if first_letter is None:
-                    new_node = SuffixTree._Node(triple_suffix, [triple_suffix[0]], root, root._depth + len(suffix) - 1)
-                    root._add_child(new_node, suffix[0])
+                if child == -1:
+                    new_node = self._new_node(triple_suffix[0], triple_suffix[1], triple_suffix[2], root,
+                                              self._depth[root] + len(suffix) - 1, bit)
+                    self._add_child(root, new_node, suffix[0])
                     self._size += 1
                 else:
-                    root = root._children[first_letter]
+                    root = child
                     triple_suffix[1] += n_chars
-                    last_chars = [root._element[0], root._element[1] + n_chars, root._element[2]]
+                    last_chars = [self._sid[root], self._start[root] + n_chars, self._end[root]]
                     suffix = suffix[n_chars:]
-                    root._element[2] = root._element[1] + n_chars
-                    new_node1 = SuffixTree._Node(last_chars, root._mark[:len(root._mark)], root, root._depth)
-                    if len(root._children) == 0:
-                        root._depth -= last_chars[2] - last_chars[1] - 1
-                    else:
-                        root._depth -= last_chars[2] - last_chars[1]
-                    if triple_suffix[0] not in root._mark:
-                        root._mark.append(triple_suffix[0])
-                    for child in root._children.values():
-                        child._parent = new_node1
-                    new_node1._children = root._children
-                    new_node2 = SuffixTree._Node(triple_suffix, [triple_suffix[0]], root, root._depth + len(suffix) - 1)
-                    root._children = {self._to_string(last_chars)[0]: new_node1,
-                                      self._to_string(triple_suffix)[0]: new_node2}
+                    self._end[root] = self._start[root] + n_chars
+                    new_node1 = self._new_node(last_chars[0], last_chars[1], last_chars[2], root, self._depth[root],
+                                               self._mark[root])
+                    self._depth[root] = self._depth[self._parent[root]] + n_chars  # root now ends at the split
+                    self._mark[root] |= bit
+                    self._move_children(root, new_node1)
+                    new_node2 = self._new_node(triple_suffix[0], triple_suffix[1], triple_suffix[2], root,
+                                               self._depth[root] + len(suffix) - 1, bit)
+                    self._add_child(root, new_node1, self._first_char(new_node1))
+                    self._add_child(root, new_node2, suffix[0])
                     self._size += 2
 
+    def _edge_length(self, node, pos):
+        """Return the length of the edge entering node, where pos is the current phase of an open leaf"""
+        end = self._end[node]
+        return (pos + 1 if end == -1 else end) - self._start[node]
+
+    def _ukkonen(self, i, text):
+        """Add every suffix of text (the i-th string followed by its terminator) to the SuffixTree with Ukkonen's online
+        algorithm, using suffix links and open-ended leaf edges (end -1)"""
+        texts = self._T
+        start = self._start
+        link = self._link
+        bit = 1 << (i - 1)
+        active_node = 0
+        active_edge = 0
+        active_length = 0
+        remainder = 0
+        for pos in range(len(text)):
+            c = text[pos]
+            remainder += 1
+            last_new = -1
+            while remainder > 0:
+                if active_length == 0:
+                    active_edge = pos
+                nxt = self._get_child(active_node, text[active_edge])
+                if nxt == -1:
+                    if last_new != -1:
+                        link[last_new] = active_node
+                        last_new = -1
+                    if active_node != 0 or pos != len(text) - 1:  # the terminator alone is not part of the tree
+                        leaf = self._new_node(i, pos, -1, active_node, 0, bit)
+                        self._add_child(active_node, leaf, c)
+                        self._size += 1
+                else:
+                    length = self._edge_length(nxt, pos)
+                    if active_length >= length:
+                        # walk down (skip/count) to the next node
+                        active_edge += length
+                        active_length -= length
+                        active_node = nxt
+                        continue
+                    if texts[self._sid[nxt] - 1][start[nxt] + active_length] == c:
+                        # rule 3: the suffix is already implicitly in the tree, the phase ends here
+                        if last_new != -1 and active_node != 0:
+                            link[last_new] = active_node
+                        active_length += 1
+                        break
+                    split = self._new_node(self._sid[nxt], start[nxt], start[nxt] + active_length, active_node, 0, 0)
+                    self._replace_child(active_node, nxt, split, text[active_edge])
+                    start[nxt] += active_length
+                    self._parent[nxt] = split
+                    self._add_child(split, nxt, self._first_char(nxt))
+                    leaf = self._new_node(i, pos, -1, split, 0, bit)
+                    self._add_child(split, leaf, c)
+                    self._size += 2
+                    if last_new != -1:
+                        link[last_new] = split
+                    last_new = split
+                remainder -= 1
+                if active_node == 0 and active_length > 0:
+                    active_length -= 1
+                    active_edge = pos - remainder + 1
+                elif active_node != 0:
+                    active_node = link[active_node] if link[active_node] != -1 else 0
+
+        # with a shared terminator "$" the remaining suffixes end on leaves of previous strings, that are now shared
+        # with this one (the last one is the suffix "$" alone)
+        while remainder > 1:
+            nxt = self._get_child(active_node, text[active_edge])
+            while self._child[nxt] != -1 and active_length >= self._edge_length(nxt, 0):
+                length = self._edge_length(nxt, 0)
+                active_edge += length
+                active_length -= length
+                active_node = nxt
+                nxt = self._get_child(active_node, text[active_edge])
+            self._mark[nxt] |= bit
+            remainder -= 1
+            if active_node == 0:
+                active_length -= 1
+                active_edge += 1
+            else:
+                active_node = link[active_node] if link[active_node] != -1 else 0
+
+    def _build_ukkonen(self):
+        """Build the SuffixTree of all the strings in linear time and fill depths and marks of every node"""
+        for i in range(len(self._S)):
+            first = len(self._end)
+            text = self._T[i]
+            self._ukkonen(i + 1, text)
+            for node in range(first, len(self._end)):
+                if self._end[node] == -1:
+                    self._end[node] = len(text)  # close the open-ended leaf edges
+
+        marks = {}
+        order = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            for child in self._children(node):
+                self._depth[child] = self._depth[node] + self._end[child] - self._start[child]
+                stack.append(child)
+        for node in reversed(order):
+            if self._child[node] == -1:
+                self._depth[node] -= 1  # the terminator at the end of the leaf edge is not counted
+            elif node != 0:
+                mark = 0
+                for child in self._children(node):
+                    mark |= self._mark[child]
+                self._mark[node] = marks.setdefault(mark, mark)
+
     def _validate(self, p):
         """Return associated node, if position is valid."""
         if not isinstance(p, self.Position):
             raise TypeError('p must be proper Position type')
         if p._container is not self:
             raise ValueError('p does not belong to this container')
-        if p._node._parent is p._node:  # convention for deprecated nodes
+        if not 0 <= p._node < len(self._start):
             raise ValueError('p is no longer valid')
         return p._node
 
     def _make_position(self, node):
         """Return Position instance for given node (or None if no node)."""
-        return self.Position(self, node) if node is not None else None
+        return self.Position(self, node) if node != -1 else None
+
+    def _matching_statistics(self, c, counters=None, reverse=False):
+        """Yield, for every offset i of c, the length m of the longest prefix of c[i:] that occurs in the SuffixTree and
+        the deepest internal node on the path of c[i:i + m]
+        The match is computed in a single left-to-right pass over c following suffix links. If counters is a list, the
+        nodes reached and the characters compared are added to its first and second item. If reverse is True the
+        matches are the ones of the reverse complement of c, read through a ReverseComplement view"""
+        texts = self._T
+        sid = self._sid
+        start = self._start
+        end = self._end
+        child = self._child
+        depth = self._depth
+        link = self._link
+        get_child = self._get_child
+        packed = PackedSequence(c, reverse) if self._packed else None
+        if reverse:
+            c = ReverseComplement(c)
+        n = len(c)
+        node = 0  # deepest internal node on the path of the current match c[i:i + m]
+        m = 0
+        for i in range(n):
+            # extend the match of c[i:] as far as possible
+            while i + m < n:
+                d = depth[node]
+                x = get_child(node, c[i + d] if m > d else c[i + m])
+                if x == -1:
+                    break
+                text = texts[sid[x] - 1]
+                p = start[x] + m - d
+                stop = end[x]
+                if counters is not None:
+                    counters[0] += 1
+                    counters[1] -= m
+                if packed is not None:
+                    k = text.match_length(p, packed, i + m, min(stop - p, n - i - m))
+                    p += k
+                    m += k
+                else:
+                    while p < stop and i + m < n and text[p] == c[i + m]:
+                        p += 1
+                        m += 1
+                if counters is not None:
+                    counters[1] += m + (p < stop and i + m < n)  # the matched characters and the mismatch
+                if p != stop or child[x] == -1:
+                    break
+                node = x
+            yield m, node
+
+            # move to the match of c[i + 1:] following the suffix link of node and descending by skip/count
+            if m == 0:
+                continue
+            m -= 1
+            if node != 0:
+                node = link[node] if link[node] != -1 else 0
+            while depth[node] < m:
+                x = get_child(node, c[i + 1 + depth[node]])
+                if counters is not None:
+                    counters[0] += 1
+                if child[x] == -1 or depth[x] > m:
+                    break
+                node = x
 
     def _common_maximal_substrings(self, c, l):
         """Return the number of common maximal substring"""
-        string = self._S[0] + "$"
+        counters = None if self.stats is None else [0, 0]
+        started = time.perf_counter() if counters else 0
         n_comm = 0
         prev = -1
-        for i in range(len(c) - l + 1):
-            node = self._root
-            j = i
-            while True:
-                if j > len(c) - 1:
-                    if j > prev and j - i >= l:
-                        n_comm += 1
-                        prev = j
-                    break
-                node = node._children.get(c[j])
-                if node is None:
-                    if j > prev and j - i >= l:
-                        n_comm += 1
-                        prev = j
-                    break
-                sub_str = string[node._element[1] + 1:node._element[2]]
-                n = 1
-                j += 1
-                for k in range(len(sub_str)):
-                    if j > len(c) - 1:
-                        if j > prev and j - i >= l:
-                            n_comm += 1
-                            prev = j
-                        break
-                    if c[j] == sub_str[k]:
-                        j += 1
-                        n += 1
-                    else:
-                        break
-                if (len(node._children) == 0 and n == node._element[2] - node._element[1] - 1) or (
-                        len(node._children) != 0 and n == node._element[2] - node._element[1]):
-                    if len(node._children) == 0:
-                        if j > prev and j - i >= l:
-                            n_comm += 1
-                            prev = j
-                        break
-                else:
-                    if j > prev and j - i >= l:
-                        n_comm += 1
-                        prev = j
+        for i, (m, node) in enumerate(self._matching_statistics(c, counters)):
+            if i > len(c) - l:
+                break
+            j = i + m
+            if j > prev and m >= l:
+                n_comm += 1
+                prev = j
+        if counters:
+            self.stats["contaminants_scored"] += 1
+            self.stats["nodes_visited"] += counters[0]
+            self.stats["chars_compared"] += counters[1]
+            self.stats["score_seconds"] += time.perf_counter() - started
+        return n_comm
+
+    def _common_maximal_substrings_strands(self, c, l):
+        """Return the numbers of common maximal substrings of c and of its reverse complement, whose matching
+        statistics are computed in the same pass over the offsets"""
+        counters = None if self.stats is None else [0, 0]
+        started = time.perf_counter() if counters else 0
+        n_comm = [0, 0]
+        prev = [-1, -1]
+        statistics = zip(self._matching_statistics(c, counters), self._matching_statistics(c, counters, True))
+        for i, matches in enumerate(statistics):
+            if i > len(c) - l:
+                break
+            for strand, (m, node) in enumerate(matches):
+                if i + m > prev[strand] and m >= l:
+                    n_comm[strand] += 1
+                    prev[strand] = i + m
+        if counters:
+            self.stats["contaminants_scored"] += 1
+            self.stats["nodes_visited"] += counters[0]
+            self.stats["chars_compared"] += counters[1]
+            self.stats["score_seconds"] += time.perf_counter() - started
+        return tuple(n_comm)
+
+    def _common_maximal_substrings_per_string(self, c, l):
+        """Return the list of the numbers of common maximal substrings of c with each string of the SuffixTree
+        All the strings are scored in the same pass: the match of c[i:] with the i-th string ends at the deepest node
+        on the path of the common match whose mark contains i"""
+        if self._mark_up is None:
+            self._mark_up = array("i", [-1]) * len(self._start)
+            for node in self._preorder_nodes():
+                parent = self._parent[node]
+                if parent != -1:
+                    self._mark_up[node] = parent if self._mark[parent] != self._mark[node] else self._mark_up[parent]
+        n_comm = [0] * len(self._S)
+        prev = [-1] * len(self._S)
+        everything = (1 << len(self._S)) - 1
+        for i, (m, node) in enumerate(self._matching_statistics(c)):
+            if i > len(c) - l:
+                break
+            x = node if m == self._depth[node] else self._get_child(node, c[i + self._depth[node]])
+            rest = everything
+            while rest and m >= l:
+                found = self._mark[x] & rest
+                rest ^= found
+                while found:
+                    bit = found & -found
+                    found ^= bit
+                    r = bit.bit_length() - 1
+                    if i + m > prev[r]:
+                        n_comm[r] += 1
+                        prev[r] = i + m
+                x = self._mark_up[x]
+                if x == -1:
                     break
+                m = self._depth[x]
         return n_comm
 
+    def _enable_stats(self, build_seconds):
+        """Start keeping the stats of the SuffixTree, counting the nodes made by the construction: every edge split
+        made one internal node, so the splits are not counted while building"""
+        leaves = sum(1 for x in self._child if x == -1)
+        self.stats = {
+            "build_seconds": build_seconds,
+            "nodes_created": len(self._start) - 1,  # the root excluded
+            "edges_split": len(self._start) - 1 - leaves,
+            "contaminants_scored": 0,
+            "nodes_visited": 0,  # nodes reached while matching contaminants
+            "chars_compared": 0,
+            "score_seconds": 0.0,
+        }
+
+    def _preorder_nodes(self, node=0):
+        """Generate the ids of the nodes of the subtree of node in preorder (children in insertion order)"""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(list(self._children(node))))  # the first child is popped first
+
+    def _postorder_nodes(self, node=0):
+        """Generate the ids of the nodes of the subtree of node in postorder (children in insertion order)"""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node < 0:  # ~node was pushed below its children: they have all been visited
+                yield ~node
+            else:
+                stack.append(~node)
+                stack.extend(reversed(list(self._children(node))))
+
+    def _build_suffix_links(self):
+        """Set the suffix link of every internal node (the builder that inserts every suffix does not keep them)"""
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            for x in self._children(node):
+                if self._child[x] == -1:
+                    continue
+                text = self._T[self._sid[x] - 1]
+                pos = self._start[x]
+                if node == 0:
+                    target = 0
+                    pos += 1
+                else:
+                    target = self._link[node] if self._link[node] != -1 else 0
+                while pos < self._end[x]:
+                    target = self._get_child(target, text[pos])
+                    pos += self._end[target] - self._start[target]
+                self._link[x] = target if target != 0 else -1
+                stack.append(x)
+
     # ------------------------------- SuffixTree concrete methods for Contest -------------------------------
 
-    def __init__(self, S):
-        """Create an initially empty SuffixTree"""
-        self._root = self._Node(None, None, None, 0)
-        self._size = 1
+    def __init__(self, S, ukkonen=True, unique_terminators=False, packed=False, stats=False):
+        """Create the SuffixTree of the strings in S
+        If ukkonen is True the tree is built in linear time with Ukkonen's algorithm, otherwise every suffix is
+        inserted separately. If unique_terminators is True every string ends with its own terminator, so that equal
+        suffixes of different strings end on different leaves, otherwise all the strings end with $. If packed is True
+        the strings are kept as PackedSequence (2 bits per base) after the construction and the edges are compared
+        with contaminants word by word. If stats is True the counters and timers of the construction and of the
+        scoring are kept in the dict self.stats (None otherwise)"""
+        self.stats = None
+        started = time.perf_counter()
         self._S = S
-
-        for i in range(len(S)):
-            suffixes = self._generate_suffixes(S[i])
-            for suffix in suffixes:
-                self._add_suffix([i + 1, suffix[0], suffix[1] + 1])
+        if unique_terminators:
+            self._T = [S[i] + chr(self._TERMINATORS + i) for i in range(len(S))]
+        else:
+            self._T = [s + "$" for s in S]
+        self._mark_up = None  # nearest ancestor with a different mark, for _common_maximal_substrings_per_string
+        self._size = 1
+        self._sid = array("i")
+        self._start = array("i")
+        self._end = array("i")
+        self._parent = array("i")
+        self._depth = array("i")
+        self._child = array("i")  # first child
+        self._next = array("i")  # next sibling
+        self._link = array("i")  # suffix link
+        self._mark = []  # bitsets of string ids, bit i - 1 for the i-th string
+        self._table = array("i") if all(c in self._DNA for s in S for c in set(s)) else None  # child per DNA char
+        self._new_node(0, 0, 0, -1, 0, 0)  # the root
+
+        if ukkonen:
+            self._build_ukkonen()
+        else:
+            for i in range(len(S)):
+                suffixes = self._generate_suffixes(S[i])
+                for suffix in suffixes:
+                    self._add_suffix([i + 1, suffix[0], suffix[1] + 1])
+            self._build_suffix_links()
+
+        self._packed = packed
+        if packed:
+            self._T = [PackedSequence(t) for t in self._T]
+        if stats:
+            self._enable_stats(time.perf_counter() - started)
 
     def getNodeLabel(self, P):
         """Return the substring that labels the node of the SuffixTree to which position P refers
         It throws an exception if P is not valid"""
         node = self._validate(P)
-        return self._to_string(node._element)
+        label = self._to_string(self._element(node))
+        return label[:-1] + "$" if label and self._is_terminator(label[-1]) else label
 
     def pathString(self, P):
         """Return the substring associated to the path in the SuffixTree from the root to the node to which position P refers
         It throws an exception if P is invalid"""
-        path = ""
-        node = self._validate(P)
+        sid, start, length = self.pathReference(P)
+        return self._T[sid - 1][start:start + length] if length else ""
 
-        while node != self._root:
-            path = self._to_string(node._element) + path
-            node = node._parent
-
-        return path if path[-1] != '$' else path[:-1]
+    def pathReference(self, P):
+        """Return the triple (string id, start, length) of an occurrence of the substring associated to the path from
+        the root to the node to which position P refers, in constant time and without copying it
+        It throws an exception if P is invalid"""
+        node = self._validate(P)
+        end = self._end[node]
+        if self._child[node] == -1 and node != 0:
+            end -= 1  # the edge of a leaf ends with the terminator, that the depth does not count
+        return self._sid[node], end - self._depth[node], self._depth[node]
 
     def getNodeDepth(self, P):
         """Return the length of substring associated to the path in the SuffixTree from the root to the node to which position P refers.
          It throws an exception if P is invalid."""
-        return self._validate(P)._depth
+        return self._depth[self._validate(P)]
 
     def getNodeMark(self, P):
         """Return the mark of the node of the SuffixTree to which position P refers.
         It throws an exception if P is invalid."""
-        return tuple(self._validate(P)._mark)
+        return self._marks(self._mark[self._validate(P)])
 
     def child(self, P, s):
         """Return the position of the child u of the node of SuffixTree to which position P refers such that
@@ -239,11 +679,90 @@ class SuffixTree(Tree):
             - or the substring labeling u is a prefix of s
         if it exists, and it returns None otherwise (it throws an exception if P is invalid or s is empty)"""
         node = self._validate(P)
-        found_node = node._children.get(s[0])
-        if found_node is not None:
-            str = self._to_string(found_node._element)
-            if str[len(str) - 1] == "$":
+        found_node = self._get_child(node, s[0])
+        if found_node != -1:
+            str = self._to_string(self._element(found_node))
+            if self._is_terminator(str[len(str) - 1]):
                 str = str[:len(str) - 1]
             if self._check_prefix(s, str) == min(len(s), len(str)):
                 return self._make_position(found_node)
         return None
+
+    # ------------------------------- persistence -------------------------------
+
+    def save(self, path):
+        """Write the SuffixTree to the file at path in a versioned binary format of flat arrays, that load can map in
+        memory"""
+        n = len(self._start)
+        width = max(1, (len(self._T) + 7) // 8)
+        texts = [str(t).encode() for t in self._T]
+        with open(path, "wb") as f:
+            f.write(self._HEADER.pack(self._MAGIC, self._VERSION, sys.byteorder == "little", n, self._size,
+                                      len(texts), self._table is not None, width))
+            f.write(array("q", [len(t) for t in texts]).tobytes())
+            for column in self._COLUMNS:
+                self._write_aligned(f, getattr(self, column).tobytes())
+            if self._table is not None:
+                self._write_aligned(f, self._table.tobytes())
+            self._write_aligned(f, b"".join(self._mark[node].to_bytes(width, "little") for node in range(n)))
+            for t in texts:
+                f.write(t)
+
+    def _write_aligned(self, f, data):
+        """Write data to f followed by the padding to a multiple of 8 bytes"""
+        f.write(data)
+        f.write(bytes(-len(data) % 8))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Return the SuffixTree saved in the file at path
+        If mmap is True the node arrays are read-only views of the file mapped in memory, so that no node is copied
+        and processes that load the same file share its pages"""
+        with open(path, "rb") as f:
+            if mmap:
+                data = memoryview(memory_map(f.fileno(), 0, access=ACCESS_READ))
+            else:
+                data = memoryview(f.read())
+        magic, version, little, n, size, n_strings, table, width = cls._HEADER.unpack_from(data)
+        if magic != cls._MAGIC:
+            raise ValueError('the file is not a SuffixTree')
+        if version != cls._VERSION:
+            raise ValueError('unsupported SuffixTree version {0}'.format(version))
+        swap = bool(little) != (sys.byteorder == "little")
+        if swap and mmap:
+            raise ValueError('the SuffixTree was saved with a different byte order, load it with mmap=False')
+
+        tree = cls.__new__(cls)
+        offset = cls._HEADER.size
+        lengths = cls._column(data[offset:offset + 8 * n_strings], "q", False, swap).tolist()
+        offset += 8 * n_strings
+        for column in cls._COLUMNS:
+            setattr(tree, column, cls._column(data[offset:offset + 4 * n], "i", mmap, swap))
+            offset += 4 * n + (-4 * n % 8)
+        tree._table = None
+        if table:
+            tree._table = cls._column(data[offset:offset + 20 * n], "i", mmap, swap)
+            offset += 20 * n + (-20 * n % 8)
+        tree._mark = cls._Marks(data[offset:offset + width * n], width)
+        offset += width * n + (-width * n % 8)
+        tree._T = []
+        for length in lengths:
+            tree._T.append(str(data[offset:offset + length], "utf-8"))
+            offset += length
+        tree._S = [t[:-1] for t in tree._T]
+        tree._size = size
+        tree._mark_up = None
+        tree._packed = False
+        tree.stats = None
+        return tree
+
+    @staticmethod
+    def _column(data, typecode, mmap, swap):
+        """Return the array of typecode stored in data, as a view of the mapped file if mmap is True"""
+        if mmap:
+            return data.cast(typecode)
+        column = array(typecode)
+        column.frombytes(data)
+        if swap:
+            column.byteswap()
+        return column
@@ -84,10 +84,11 @@ class Tree:
 
     def depth(self, p):
         """Return the number of levels separating Position p from the root."""
-        if self.is_root(p):
-            return 0
-        else:
-            return 1 + self.depth(self.parent(p))
+        d = 0
+        while not self.is_root(p):  # climb to the root without recursion
+            p = self.parent(p)
+            d += 1
+        return d
 
     def _height1(self):  # works, but O(n^2) worst-case time
         """Return the height of the alberi."""
@@ -95,10 +96,18 @@ class Tree:
 
     def _height2(self, p):  # time is linear in size of subtree
         """Return the height of the subtree rooted at Position p."""
-        if self.is_leaf(p):
-            return 0
-        else:
-            return 1 + max(self._height2(c) for c in self.children(p))
+        stack = [[iter(self.children(p)), -1]]  # children still to visit and max height among the visited ones
+        while True:
+            top = stack[-1]
+            c = next(top[0], None)
+            if c is not None:
+                stack.append([iter(self.children(c)), -1])  # descend into c
+            else:
+                h = top[1] + 1  # all children visited (0 for a leaf)
+                stack.pop()
+                if not stack:
+                    return h
+                stack[-1][1] = max(stack[-1][1], h)
 
     def height(self, p=None):
         """Return the height of the subtree rooted at Position p.
@@ -107,7 +116,7 @@ class Tree:
     """
         if p is None:
             p = self.root()
-        return self._height2(p)  # start _height2 recursion
+        return self._height2(p)
 
     def __iter__(self):
         """Generate an iteration of the alberi's elements."""
@@ -121,28 +130,38 @@ class Tree:
     def preorder(self):
         """Generate a preorder iteration of positions in the alberi."""
         if not self.is_empty():
-            for p in self._subtree_preorder(self.root()):  # start recursion
+            for p in self._subtree_preorder(self.root()):
                 yield p
 
     def _subtree_preorder(self, p):
         """Generate a preorder iteration of positions in subtree rooted at p."""
         yield p  # visit p before its subtrees
-        for c in self.children(p):  # for each child c
-            for other in self._subtree_preorder(c):  # do preorder of c's subtree
-                yield other  # yielding each to our caller
+        stack = [iter(self.children(p))]  # children still to visit at every level, no recursive generators
+        while stack:
+            c = next(stack[-1], None)
+            if c is None:
+                stack.pop()  # subtree completed
+            else:
+                yield c
+                stack.append(iter(self.children(c)))
 
     def postorder(self):
         """Generate a postorder iteration of positions in the alberi."""
         if not self.is_empty():
-            for p in self._subtree_postorder(self.root()):  # start recursion
+            for p in self._subtree_postorder(self.root()):
                 yield p
 
     def _subtree_postorder(self, p):
         """Generate a postorder iteration of positions in subtree rooted at p."""
-        for c in self.children(p):  # for each child c
-            for other in self._subtree_postorder(c):  # do postorder of c's subtree
-                yield other  # yielding each to our caller
-        yield p  # visit p after its subtrees
+        stack = [(p, iter(self.children(p)))]  # positions on the path and their children still to visit
+        while stack:
+            q, it = stack[-1]
+            c = next(it, None)
+            if c is None:
+                stack.pop()
+                yield q  # visit q after its subtrees
+            else:
+                stack.append((c, iter(self.children(c))))
 
     def breadthfirst(self):
         """Generate a breadth-first iteration of the positions of the alberi."""
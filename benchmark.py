@@ -0,0 +1,182 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Midterm_Homework"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Final_Homework"))
+
+from personal_collections.dna_contamination import DNAContamination  # noqa: E402
+from personal_collections.suffix_tree import SuffixTree  # noqa: E402
+from facebook import facebook_enmy, facebook_friend  # noqa: E402
+
+
+# ------------------------------- seeded generators -------------------------------
+
+def random_dna(n, rng):
+    """Return a uniformly random DNA string of length n"""
+    return "".join(rng.choices("ACGT", k=n))
+
+
+def repeat_dna(n, rng, units=8, unit_length=(20, 300), mutation=0.02):
+    """Return a DNA string of length n made for half of random segments and for half of copies of a few repeat units
+    (also in tandem), each base of a copy being mutated with probability mutation"""
+    pool = [random_dna(rng.randint(*unit_length), rng) for _ in range(units)]
+    parts = []
+    length = 0
+    while length < n:
+        if rng.random() < 0.5:
+            part = random_dna(rng.randint(*unit_length), rng)
+        else:
+            part = rng.choice(pool) * rng.randint(1, 3)
+            part = "".join(rng.choice("ACGT") if rng.random() < mutation else c for c in part)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:n]
+
+
+def contaminant_batch(s, count, length, l, rng, planted=2):
+    """Return count contaminants [id, string] of the given length, random but for up to planted substrings of s of
+    length between l and 2l copied at random offsets (none for a quarter of them)"""
+    batch = []
+    for i in range(count):
+        c = list(random_dna(length, rng))
+        for _ in range(0 if rng.random() < 0.25 else planted):
+            m = min(rng.randint(l, 2 * l), length, len(s))
+            p = rng.randrange(len(s) - m + 1)
+            q = rng.randrange(length - m + 1)
+            c[q:q + m] = s[p:p + m]
+        batch.append([i, "".join(c)])
+    return batch
+
+
+def power_law_graph(n, m, rng, exponent=2.5, weights=(1, 10)):
+    """Return n voters and up to m friendships whose endpoints follow a power-law degree distribution (Chung-Lu
+    model); every friendship has a random integer weight in the range weights"""
+    cumulative = []
+    total = 0
+    for i in range(n):
+        total += (i + 1) ** (-1 / (exponent - 1))
+        cumulative.append(total)
+    E = dict()
+    for u, v in zip(rng.choices(range(n), cum_weights=cumulative, k=m), rng.choices(range(n), cum_weights=cumulative, k=m)):
+        if u != v and (v, u) not in E:
+            E[(u, v)] = rng.randint(*weights)
+    return list(range(n)), E
+
+
+# ------------------------------- measures -------------------------------
+
+def code_revision():
+    """Return the git commit of the measured code, or None if it is not a git checkout or git is not available"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def measure(setup, run, repeat=1, memory=True):
+    """Return the best time in seconds of run(setup()) over repeat runs (setup is not timed) and, if memory is True,
+    the peak of the memory allocated by Python during a further traced run"""
+    seconds = None
+    for _ in range(repeat):
+        data = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(data)
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    peak = None
+    if memory:
+        data = setup()
+        gc.collect()
+        tracemalloc.start()
+        run(data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def dna_benchmarks(sizes, rng, l=20, contaminants=200, length=100, k=20):
+    """Generate (name, size, params, setup, run) for SuffixTree construction, addContaminant and getContaminants on
+    random and repeat-rich DNA of the given sizes"""
+    for n in sizes:
+        for kind, generator in (("random", random_dna), ("repeat", repeat_dna)):
+            s = generator(n, rng)
+            batch = contaminant_batch(s, contaminants, length, l, rng)
+            params = {"dna": kind}
+            yield "suffix_tree_build", n, params, lambda s=s: s, lambda s: SuffixTree([s])
+            params = {"dna": kind, "l": l, "contaminants": contaminants, "length": length}
+            yield ("add_contaminant", n, params, lambda s=s: DNAContamination(s, l),
+                   lambda d, batch=batch: [d.addContaminant(c) for c in batch])
+
+            def scored(s=s, batch=batch):
+                d = DNAContamination(s, l)
+                for c in batch:
+                    d.addContaminant(c)
+                return d
+            yield "get_contaminants", n, dict(params, k=k), scored, lambda d: d.getContaminants(k)
+
+
+def graph_benchmarks(sizes, rng, degree=5, enmy_methods=("greedy",), friend_methods=("dinic",)):
+    """Generate (name, size, params, setup, run) for facebook_enmy and facebook_friend on power-law graphs with the
+    given numbers of voters"""
+    for n in sizes:
+        voters, E = power_law_graph(n, degree * n, rng)
+        V = {v: (rng.randint(0, 100), rng.randint(0, 100)) for v in voters}
+        for method in enmy_methods:
+            params = {"method": method, "edges": len(E)}
+            yield "facebook_enmy", n, params, lambda: None, lambda _, method=method: facebook_enmy(set(voters), E, method=method)
+        for method in friend_methods:
+            params = {"method": method, "edges": len(E)}
+            yield "facebook_friend", n, params, lambda: None, lambda _, method=method: facebook_friend(V, E, method=method)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time and memory-profile the suffix tree and the facebook functions "
+                                                 "on seeded synthetic inputs, writing the results as JSON")
+    parser.add_argument("--dna-sizes", type=int, nargs="*", default=[10000, 50000, 200000])
+    parser.add_argument("--graph-sizes", type=int, nargs="*", default=[1000, 5000, 20000])
+    parser.add_argument("--enmy-methods", nargs="*", default=["greedy", "fm", "multilevel"])
+    parser.add_argument("--friend-methods", nargs="*", default=["dinic", "push_relabel"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark, the best time is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced run that measures the peak memory")
+    parser.add_argument("--output", default="-", help="JSON file to write (- for standard output)")
+    parser.add_argument("--label", help="free text recorded with the results to tag the run")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    benchmarks = list(dna_benchmarks(args.dna_sizes, rng))
+    benchmarks += graph_benchmarks(args.graph_sizes, rng, enmy_methods=args.enmy_methods,
+                                   friend_methods=args.friend_methods)
+    results = []
+    for name, size, params, setup, run in benchmarks:
+        seconds, peak = measure(setup, run, args.repeat, not args.no_memory)
+        results.append({"benchmark": name, "size": size, "params": params, "seconds": seconds, "peak_bytes": peak})
+        print("%-18s %8d %-60s %9.3f s" % (name, size, params, seconds), file=sys.stderr)
+
+    report = {
+        "meta": {"revision": code_revision(), "label": args.label, "seed": args.seed, "repeat": args.repeat,
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()